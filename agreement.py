@@ -0,0 +1,212 @@
+"""Cross-algorithm hint deduplication and agreement.
+
+Every hint under ``algorithms/<algorithm>/<assignment>/<requestID>_<n>.json``
+(and, optionally, every gold-standard tutor hint) is reduced to a 64-bit
+canonical key of its target AST with ``hint_graph.state_key``, which ignores
+node ids and child key names. Identical file contents are parsed only once.
+
+Hints are then grouped once by (request, key). The algorithms present in
+each group form a row of an indicator matrix, and summing the outer
+products of those rows per request gives every algorithm x algorithm
+agreement count without comparing any pair of trees. The same grouping
+yields the number of duplicate hints.
+
+Usage (from a dataset directory such as ``isnap-s16``)::
+
+    python ../agreement.py --gold gold-standard.csv --output agreement.csv
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from hint_graph import state_key
+from schema import read_table
+
+REQUEST = ["assignmentID", "requestID"]
+
+# 64-bit keys are ample for a few thousand hints per request
+DIGEST_SIZE = 8
+
+
+def hint_files(algorithms_dir: str, backend: str = "csv") -> pd.DataFrame:
+    """List the generated hint files under an ``algorithms`` directory.
+
+    Args:
+        algorithms_dir: Directory laid out as
+            ``<algorithm>/<assignmentID>/<requestID>_<n>.json``.
+        backend: Read the ``"csv"`` (on-disk JSON) files or the
+            ``"sqlite"`` store written by ``corpus.py ingest``.
+
+    Returns:
+        pd.DataFrame: ``algorithm``, ``assignmentID``, ``requestID`` and
+        ``json`` (the file's text) per hint file.
+    """
+    if backend == "sqlite":
+        import corpus
+        files = corpus.read_hint_files(algorithms_dir)
+    else:
+        paths = sorted(Path(algorithms_dir).glob("*/*/*.json"))
+        files = pd.DataFrame({
+            "algorithm": [p.parts[-3] for p in paths],
+            "assignmentID": [p.parts[-2] for p in paths],
+            "requestID": [p.stem.split("_", 1)[0] for p in paths],
+            "json": [p.read_text() for p in paths],
+        })
+
+    return files[["algorithm", "assignmentID", "requestID", "json"]]
+
+
+def gold_hints(gold_path: str) -> pd.DataFrame:
+    """Gold-standard tutor hints in the format of :func:`hint_files`."""
+    gold = read_table("gold", gold_path, columns=REQUEST + ["to"])
+    gold = gold[gold["to"].notna()]
+
+    return pd.DataFrame({
+        "algorithm": "gold",
+        "assignmentID": gold["assignmentID"].astype(str).to_numpy(),
+        "requestID": gold["requestID"].astype(str).to_numpy(),
+        "json": gold["to"].to_numpy(),
+    })
+
+
+def hint_keys(hints: pd.DataFrame) -> pd.DataFrame:
+    """Replace the JSON text of each hint with its canonical AST key.
+
+    Args:
+        hints: Output of :func:`hint_files` and/or :func:`gold_hints`.
+
+    Returns:
+        pd.DataFrame: ``algorithm``, ``assignmentID``, ``requestID`` and
+        ``key`` per hint.
+    """
+    texts = hints["json"]
+    keys = {
+        text: state_key(json.loads(text), digest_size=DIGEST_SIZE)
+        for text in texts.unique()
+    }
+    return hints.drop(columns="json").assign(key=texts.map(keys))
+
+
+def agreement(keys: pd.DataFrame) -> tuple:
+    """Count shared hints between every pair of algorithms, per request.
+
+    Args:
+        keys: Output of :func:`hint_keys`.
+
+    Returns:
+        tuple: ``(pairs, duplicates)``. ``pairs`` has one row per request
+        and ordered algorithm pair ``(a, b)`` with the number of distinct
+        hints each gave, the number they share and their Jaccard index;
+        ``a == b`` rows hold each algorithm's distinct hint count.
+        ``duplicates`` has, per algorithm, its number of hint files and
+        how many of them repeat a hint that it (``within``) or any
+        algorithm (``across``) already gave for the same request, with
+        hints taken in input order.
+    """
+    algorithms, algorithm_codes = np.unique(
+        keys["algorithm"].to_numpy(), return_inverse=True
+    )
+    n_algorithms = len(algorithms)
+
+    # One pass: number every (request, key) group and every request
+    groups = keys.groupby(REQUEST + ["key"], sort=True).ngroup().to_numpy()
+    n_groups = groups.max() + 1 if len(groups) else 0
+
+    indicator = np.zeros((n_groups, n_algorithms), dtype=np.int64)
+    indicator[groups, algorithm_codes] = 1
+
+    group_requests = (
+        keys.assign(group=groups)
+        .drop_duplicates("group")
+        .sort_values("group")[REQUEST]
+        .reset_index(drop=True)
+    )
+    request_codes = group_requests.groupby(
+        REQUEST, sort=False
+    ).ngroup().to_numpy()
+    requests = group_requests.drop_duplicates().reset_index(drop=True)
+
+    # shared[r, a, b]: distinct hints algorithms a and b both gave for r
+    shared = np.zeros((len(requests), n_algorithms, n_algorithms),
+                      dtype=np.int64)
+    np.add.at(shared, request_codes,
+              indicator[:, :, None] * indicator[:, None, :])
+
+    distinct = np.diagonal(shared, axis1=1, axis2=2)
+    union = distinct[:, :, None] + distinct[:, None, :] - shared
+
+    r, a, b = np.indices(shared.shape).reshape(3, -1)
+    pairs = pd.DataFrame({
+        "assignmentID": requests["assignmentID"].to_numpy()[r],
+        "requestID": requests["requestID"].to_numpy()[r],
+        "a": algorithms[a],
+        "b": algorithms[b],
+        "n_a": distinct[r, a],
+        "n_b": distinct[r, b],
+        "shared": shared[r, a, b],
+    })
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pairs["jaccard"] = pairs["shared"] / union[r, a, b]
+
+    # Only pairs in which both algorithms hinted on the request
+    pairs = pairs[(pairs["n_a"] > 0) & (pairs["n_b"] > 0)]
+
+    files = pd.DataFrame({"algorithm": algorithms[algorithm_codes],
+                          "group": groups})
+    duplicates = (
+        files
+        .assign(
+            within=files.duplicated(["algorithm", "group"]),
+            across=files.duplicated("group"),
+        )
+        .groupby("algorithm")
+        .agg(n_files=("group", "size"),
+             within=("within", "sum"),
+             across=("across", "sum"))
+        .reset_index()
+    )
+
+    return pairs.reset_index(drop=True), duplicates
+
+
+def agreement_matrix(pairs: pd.DataFrame,
+                     value: str = "jaccard") -> pd.DataFrame:
+    """Average per-request agreement into an algorithm x algorithm matrix."""
+    return pairs.pivot_table(index="a", columns="b", values=value,
+                             aggfunc="mean")
+
+
+def main():
+    """Print agreement between hint algorithms and duplicate counts."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--algorithms-dir", default="algorithms")
+    parser.add_argument("--gold", default=None,
+                        help="also compare against gold-standard.csv")
+    parser.add_argument("--backend", choices=["csv", "sqlite"],
+                        default="csv")
+    parser.add_argument("--output", default=None,
+                        help="write per-request agreement as CSV")
+    args = parser.parse_args()
+
+    hints = hint_files(args.algorithms_dir, args.backend)
+    if args.gold:
+        hints = pd.concat([hints, gold_hints(args.gold)], ignore_index=True)
+
+    pairs, duplicates = agreement(hint_keys(hints))
+
+    if args.output:
+        pairs.to_csv(args.output, index=False)
+
+    with pd.option_context("display.width", 200,
+                           "display.max_columns", None):
+        print(agreement_matrix(pairs).round(3))
+        print(duplicates.to_string(index=False))
+    print(f"{duplicates['across'].sum()} of {duplicates['n_files'].sum()} "
+          "hints duplicate another hint for the same request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""As-of joins between hint ratings and ProgSnap2 events.
+
+Attaches each rated hint in ``isnap-f16/ratings.csv`` to the MainTable
+events around it: the last event with a code state at or before the hint
+(the code the hint was given on) and the first edit after it.
+
+Both sides are sorted once by (key, time). Each row's key code and time
+rank are packed into one integer, so a single vectorised binary search
+(``np.searchsorted``) finds every row's preceding or following event
+within its key. Memory is linear in the size of both inputs; no
+cross-product of ratings and events is ever built.
+
+Usage (from the repository root)::
+
+    python asof.py --ratings isnap-f16/ratings.csv \\
+        --main-table prog-snap-2/MainTable.csv --tolerance 600
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from schema import read_table
+
+# ProgSnap2 event types that change the student's code
+EDIT_TYPES = ["File.Edit"]
+
+# Seconds within which a matched event must fall
+DEFAULT_TOLERANCE = 10 * 60
+
+
+def asof_indices(left_keys: pd.DataFrame, left_times: np.ndarray,
+                 right_keys: pd.DataFrame, right_times: np.ndarray,
+                 direction: str = "backward", tolerance: float = None,
+                 allow_exact_matches: bool = True) -> np.ndarray:
+    """Find, for each left row, the nearest right row with the same key.
+
+    Args:
+        left_keys: Key columns of the left rows.
+        left_times: Time of each left row.
+        right_keys: Key columns of the right rows, in the same order.
+        right_times: Time of each right row.
+        direction: ``"backward"`` for the last right row at or before each
+            left row, ``"forward"`` for the first one at or after it.
+        tolerance: Largest allowed time difference, if any.
+        allow_exact_matches: Whether right rows at exactly the left row's
+            time can match.
+
+    Returns:
+        np.ndarray: Position of the matched right row for each left row,
+        or -1 where there is none.
+    """
+    n_left = len(left_keys)
+    left_times = np.asarray(left_times, dtype=np.float64)
+    right_times = np.asarray(right_times, dtype=np.float64)
+
+    # Shared integer codes for the keys and the times of both sides
+    keys = pd.concat([left_keys, right_keys], ignore_index=True)
+    key_codes = keys.groupby(list(keys.columns), sort=False,
+                             dropna=False).ngroup().to_numpy()
+    times = np.concatenate([left_times, right_times])
+    _, time_ranks = np.unique(times, return_inverse=True)
+
+    packed = key_codes.astype(np.int64) * (len(times) + 1) + time_ranks
+    valid = ~np.isnan(times)
+    left_packed, right_packed = packed[:n_left], packed[n_left:]
+    left_valid, right_valid = valid[:n_left], valid[n_left:]
+
+    right_rows = np.flatnonzero(right_valid)
+    order = right_rows[np.argsort(right_packed[right_rows], kind="stable")]
+    sorted_packed = right_packed[order]
+
+    if direction == "backward":
+        side = "right" if allow_exact_matches else "left"
+        pos = np.searchsorted(sorted_packed, left_packed, side=side) - 1
+    elif direction == "forward":
+        side = "left" if allow_exact_matches else "right"
+        pos = np.searchsorted(sorted_packed, left_packed, side=side)
+    else:
+        raise ValueError(f"Unknown direction: {direction}")
+
+    in_range = (pos >= 0) & (pos < len(order))
+    matched = np.full(n_left, -1, dtype=np.int64)
+    matched[in_range] = order[pos[in_range]]
+
+    # The neighbour in packed order may belong to another key
+    left_codes = key_codes[:n_left]
+    right_codes = key_codes[n_left:]
+    found = in_range & left_valid
+    found[found] = right_codes[matched[found]] == left_codes[found]
+
+    if tolerance is not None:
+        gap = np.abs(right_times[matched[found]] - left_times[found])
+        found[found] = gap <= tolerance
+
+    return np.where(found, matched, -1)
+
+
+def _event_times(events: pd.DataFrame) -> np.ndarray:
+    """ServerTimestamp of each event in epoch seconds."""
+    timestamps = pd.to_datetime(events["ServerTimestamp"], utc=True,
+                                format="ISO8601")
+    return ((timestamps - pd.Timestamp(0, tz="UTC"))
+            / pd.Timedelta(seconds=1)).to_numpy()
+
+
+def _take(events: pd.DataFrame, times: np.ndarray, matched: np.ndarray,
+          prefix: str) -> pd.DataFrame:
+    """Columns of the matched events, with NA where nothing matched."""
+    found = matched >= 0
+    rows = np.where(found, matched, 0)
+
+    taken = pd.DataFrame({
+        prefix + "event_id": events["EventID"].to_numpy()[rows],
+        prefix + "code_state_id": events["CodeStateID"].to_numpy()[rows],
+        prefix + "time": times[rows],
+    })
+    return taken.where(pd.Series(found), axis=0)
+
+
+def hint_follow_through(ratings: pd.DataFrame, events: pd.DataFrame,
+                        tolerance: float = DEFAULT_TOLERANCE,
+                        rating_key: list = None, event_key: list = None,
+                        edit_types: list = None) -> pd.DataFrame:
+    """Attach each rated hint to the events before and after it.
+
+    Args:
+        ratings: Rows of ``ratings.csv``, whose ``Time`` is in epoch
+            milliseconds.
+        events: MainTable rows.
+        tolerance: Seconds within which the surrounding events must fall.
+        rating_key: Columns identifying the attempt in ``ratings``.
+        event_key: Matching columns in ``events``, in the same order.
+        edit_types: Event types counted as edits.
+
+    Returns:
+        pd.DataFrame: ``ratings`` with the code state at hint time
+        (``state_*`` columns and ``state_lag``, seconds before the hint)
+        and the next edit (``edit_*`` columns and ``edit_delay``, seconds
+        after the hint).
+    """
+    rating_key = rating_key or ["Attempt ID"]
+    event_key = event_key or ["ProjectID"]
+    edit_types = edit_types or EDIT_TYPES
+
+    hint_times = ratings["Time"].to_numpy(dtype=np.float64) / 1000
+    left_keys = ratings[rating_key].astype(str).set_axis(event_key, axis=1)
+
+    event_times = _event_times(events)
+    right_keys = events[event_key].astype(str)
+
+    # Code state at hint time: last event with a code state, at or before
+    has_state = events["CodeStateID"].notna().to_numpy()
+    states = np.flatnonzero(has_state)
+    state = asof_indices(
+        left_keys, hint_times,
+        right_keys.iloc[states], event_times[states],
+        direction="backward", tolerance=tolerance,
+    )
+    state = np.where(state >= 0, states[state], -1)
+
+    # Next edit: first edit strictly after the hint
+    is_edit = events["EventType"].isin(edit_types).to_numpy()
+    edits = np.flatnonzero(is_edit)
+    edit = asof_indices(
+        left_keys, hint_times,
+        right_keys.iloc[edits], event_times[edits],
+        direction="forward", tolerance=tolerance, allow_exact_matches=False,
+    )
+    edit = np.where(edit >= 0, edits[edit], -1)
+
+    joined = pd.concat([
+        ratings.reset_index(drop=True),
+        _take(events, event_times, state, "state_"),
+        _take(events, event_times, edit, "edit_"),
+    ], axis=1)
+    joined["state_lag"] = hint_times - joined["state_time"]
+    joined["edit_delay"] = joined["edit_time"] - hint_times
+    return joined
+
+
+def main():
+    """Join rated hints to MainTable events and summarise follow-through."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ratings", default="isnap-f16/ratings.csv")
+    parser.add_argument("--main-table", default="prog-snap-2/MainTable.csv")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="seconds within which events must fall")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    ratings = read_table("ratings", args.ratings)
+    events = read_table("main", args.main_table)
+
+    joined = hint_follow_through(ratings, events, args.tolerance)
+
+    if args.output:
+        joined.to_csv(args.output, index=False)
+
+    print(f"Hints with a code state: {joined['state_event_id'].notna().sum()}"
+          f" / {len(joined)}")
+    print(f"Hints followed by an edit: {joined['edit_event_id'].notna().sum()}"
+          f" / {len(joined)}")
+    print(
+        joined
+        .groupby("Followed")[["edit_delay", "Pause Before Edit"]]
+        .describe()
+        .T
+    )
+
+
+if __name__ == "__main__":
+    main()
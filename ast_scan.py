@@ -0,0 +1,372 @@
+"""Parse-free node type counting over columns of AST JSON.
+
+Feature extraction only needs how often each grammar category occurs in a
+snapshot, but ``json.loads`` followed by a tree walk builds and visits a
+full Python object per node. Here the UTF-8 bytes of the whole ``code``
+column are scanned with numpy instead:
+
+1. every ``"type"`` key is found from the positions of the byte ``y``,
+   checking the surrounding bytes and that the key's opening quote
+   follows ``{``, ``,`` or whitespace (so it is not an escaped quote
+   inside a string value);
+2. the key must be followed by a colon, optional whitespace and a
+   quoted string, the node's type;
+3. the types are compared against the grammar's type names as
+   fixed-width byte strings, and counted per row.
+
+No Python object is created per node, and the text is scanned in chunks
+through one reused buffer, so memory stays small and flat. With
+pyarrow-backed strings the column's bytes are read without re-encoding.
+The counts match the tree walk in :func:`ast_features`
+(``tests/test_ast_scan.py``); ``python ast_scan.py`` compares and times
+both on the bundled datasets.
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from schema import pa, read_table
+
+ROOT = Path(__file__).resolve().parent
+
+QUOTE, COLON = ord('"'), ord(":")
+WHITESPACE = [ord(c) for c in " \t\r\n"]
+TYPE_KEY = np.frombuffer(b'"type"', dtype=np.uint8)
+
+# Bytes that may precede the opening quote of an object key
+KEY_PREFIX = [ord("{"), ord(",")] + WHITESPACE
+
+# Longest run of bytes allowed between a key and its value (": " etc.)
+MAX_SEPARATOR = 8
+
+# Default longest type name returned by scan_types
+MAX_TYPE_LENGTH = 64
+
+# Bytes of text scanned at once
+CHUNK_BYTES = 1 << 18
+
+CATEGORIES = ["COMMAND", "REPORTER", "HAT", "BOOLEAN"]
+
+# Grammar files a dataset directory may ship, in order of preference
+GRAMMAR_FILES = ["snap-grammar.json", "python-grammar.json"]
+
+
+def grammar_path(dataset: Path) -> Path:
+    """Find the grammar file shipped with a dataset."""
+    for name in GRAMMAR_FILES:
+        if (dataset / name).exists():
+            return dataset / name
+    raise FileNotFoundError(f"No grammar file in {dataset}")
+
+
+def load_type_to_category(grammar_path) -> dict:
+    """Map each node type in a grammar file to its category."""
+    with open(grammar_path) as f:
+        grammar = json.load(f)
+
+    type_to_category = {}
+    for category, types in grammar["categories"].items():
+        for t in types:
+            type_to_category[t] = category
+    return type_to_category
+
+
+def ast_features(ast: dict, type_to_category: dict) -> Counter:
+    """Count AST nodes and grammar categories (as ``n_<CATEGORY>``) by
+    walking a parsed tree; the reference for :func:`category_counts`."""
+    counts = Counter()
+
+    def visit(node):
+        if not isinstance(node, dict):
+            return
+
+        counts["n_nodes"] += 1
+        category = type_to_category.get(node.get("type"))
+        if category:
+            counts["n_" + category] += 1
+
+        for child in node.get("children", {}).values():
+            visit(child)
+
+    visit(ast)
+    return counts
+
+
+def _utf8_column(codes: pd.Series) -> tuple:
+    """The UTF-8 bytes of a string column, end to end.
+
+    With pyarrow-backed strings this is a view of the column's own data.
+
+    Returns:
+        tuple: ``(text, row_ends)``, the bytes of every row and the
+        offset at which each row ends.
+    """
+    array = None
+    if pa is not None:
+        try:
+            array = pa.array(codes, type=pa.large_string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+
+    if array is None:
+        encoded = codes.fillna("").str.encode("utf-8")
+        text = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return text, np.cumsum(encoded.str.len().to_numpy(dtype=np.int64))
+
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    _, offsets, data = array.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[
+        array.offset:array.offset + len(array) + 1
+    ]
+    if data is None:
+        text = np.empty(0, dtype=np.uint8)
+    else:
+        text = np.frombuffer(data, dtype=np.uint8)[offsets[0]:offsets[-1]]
+    return text, offsets[1:] - offsets[0]
+
+
+def _scan_chunk(buffer: np.ndarray, length: int, width: int) -> tuple:
+    """Find the type values in ``buffer[:length]``.
+
+    ``buffer`` must extend at least ``MAX_SEPARATOR + width + 2`` bytes
+    past ``length``, so that fixed-width windows fit anywhere.
+
+    Returns:
+        tuple: ``(value_start, types)``, see :func:`scan_types`.
+    """
+    # Candidate keys, anchored on the "y" of "type"
+    start = np.flatnonzero(buffer[:length] == ord("y")) - 2
+    start = start[start >= 0]
+    for offset, char in enumerate(TYPE_KEY):
+        start = start[buffer[start + offset] == char]
+    start = start[(start == 0) | np.isin(buffer[start - 1], KEY_PREFIX)]
+
+    # Then ":" and the opening quote of a string, usually as :" or : "
+    after = start + 6
+    compact = (buffer[after] == COLON) & (buffer[after + 1] == QUOTE)
+    spaced = (
+        ~compact & (buffer[after] == COLON) & (buffer[after + 1] == ord(" "))
+        & (buffer[after + 2] == QUOTE)
+    )
+    value_start = np.where(compact, after + 2, after + 3)
+    other = np.flatnonzero(~compact & ~spaced)
+    if len(other):
+        value_start[other] = _value_start(buffer, after[other])
+    value_start = value_start[value_start >= 0]
+
+    # The type runs up to the closing quote; longer types become empty
+    types = sliding_window_view(buffer, width + 1)[value_start]
+    is_end = types == QUOTE
+    type_length = is_end.argmax(axis=1)
+    type_length[~is_end[np.arange(len(types)), type_length]] = 0
+    types = types[:, :width] * (np.arange(width) < type_length[:, None])
+    types = types.view(f"S{width}").ravel()
+
+    return value_start, types
+
+
+def _value_start(buffer: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Where a ``"type"`` key's string value starts, in general layout.
+
+    Args:
+        buffer: Padded text being scanned.
+        after: Offset just past each key's closing quote.
+
+    Returns:
+        np.ndarray: Offset of each value's first byte, or -1 where the key
+        is not followed by a colon, whitespace and a string.
+    """
+    window = sliding_window_view(buffer, MAX_SEPARATOR + 1)[after]
+    is_quote = window == QUOTE
+    separator = is_quote.argmax(axis=1)
+    inside = np.arange(MAX_SEPARATOR + 1) < separator[:, None]
+    is_colon = (window == COLON) & inside
+    is_space = np.isin(window, WHITESPACE) & inside
+    is_value = (
+        is_quote.any(axis=1)
+        & (is_colon.sum(axis=1) == 1)
+        & ((is_colon | is_space).sum(axis=1) == separator)
+    )
+    return np.where(is_value, after + separator + 1, -1)
+
+
+def scan_types(codes: pd.Series, width: int = MAX_TYPE_LENGTH):
+    """Locate the type of every node in a column of ASTs.
+
+    The column is scanned in chunks of whole rows of about
+    ``CHUNK_BYTES`` each, copied into one reused buffer, so memory use
+    does not grow with the size of the column.
+
+    Args:
+        codes: JSON text of one AST per row.
+        width: Longest type name to return.
+
+    Yields:
+        tuple: ``(rows, types)`` per chunk: the row of each node and its
+        type as a zero-padded ``S<width>`` byte string (empty if longer
+        than ``width``).
+    """
+    text, row_ends = _utf8_column(codes)
+    if not len(text):
+        return
+    row_starts = np.concatenate([[0], row_ends[:-1]])
+
+    # Row ranges of about CHUNK_BYTES each (at least one row)
+    firsts = np.unique(np.searchsorted(
+        row_starts, np.arange(0, len(text), CHUNK_BYTES), side="right"
+    ) - 1)
+    lasts = np.append(firsts[1:], len(row_ends))
+    sizes = row_ends[lasts - 1] - row_starts[firsts]
+
+    padding = MAX_SEPARATOR + width + 2
+    buffer = np.empty(sizes.max(initial=0) + padding, dtype=np.uint8)
+    for first, last, size in zip(firsts, lasts, sizes):
+        offset = row_starts[first]
+        buffer[:size] = text[offset:offset + size]
+        buffer[size:size + padding] = ord(" ")
+
+        value_start, types = _scan_chunk(buffer, size, width)
+        rows = first + np.searchsorted(
+            row_ends[first:last] - offset, value_start, side="right"
+        )
+        yield rows, types
+
+
+def count_types(codes: pd.Series, type_to_column: dict, columns: list,
+                nodes_column: str = None) -> np.ndarray:
+    """Count node types per row, grouped into output columns.
+
+    Args:
+        codes: JSON text of one AST per row.
+        type_to_column: Output column of each counted node type; types
+            not listed are ignored.
+        columns: Output columns, in order.
+        nodes_column: Column of ``columns`` that counts every node, if
+            any, taken from the same scan.
+
+    Returns:
+        np.ndarray: ``(len(codes), len(columns))`` matrix of counts.
+    """
+    counts = np.zeros((len(codes), len(columns)), dtype=np.int64)
+    names = sorted(name.encode() for name in type_to_column)
+    if not names and nodes_column is None:
+        return counts
+
+    # Wide enough for every counted name; longer types cannot match
+    width = max(map(len, names), default=1)
+    known = np.array(names, dtype=f"S{width}")
+    column = np.array(
+        [columns.index(type_to_column[name.decode()]) for name in names],
+        dtype=np.int64,
+    )
+
+    for rows, types in scan_types(codes, width):
+        if nodes_column is not None and len(rows):
+            # Rows are ascending within a chunk
+            first = rows[0]
+            nodes = np.bincount(rows - first)
+            counts[first:first + len(nodes),
+                   columns.index(nodes_column)] += nodes
+        if not names:
+            continue
+        index = np.minimum(np.searchsorted(known, types), len(known) - 1)
+        matched = known[index] == types
+        np.add.at(counts, (rows[matched], column[index[matched]]), 1)
+    return counts
+
+
+def category_counts(codes: pd.Series, type_to_category: dict,
+                    categories: list = None,
+                    nodes: bool = False) -> pd.DataFrame:
+    """Count grammar categories in every AST of a column.
+
+    Args:
+        codes: JSON text of one AST per row.
+        type_to_category: Grammar category of each node type.
+        categories: Categories to count (defaults to ``CATEGORIES``).
+        nodes: Also count all nodes, as ``n_nodes``, in the same scan.
+
+    Returns:
+        pd.DataFrame: One ``n_<CATEGORY>`` column per category (and
+        ``n_nodes``), aligned with ``codes``.
+    """
+    categories = categories or CATEGORIES
+    type_to_column = {
+        t: "n_" + category for t, category in type_to_category.items()
+        if category in categories
+    }
+    columns = ["n_" + c for c in categories] + (["n_nodes"] if nodes else [])
+    counts = count_types(codes, type_to_column, columns,
+                         "n_nodes" if nodes else None)
+    return pd.DataFrame(counts, index=codes.index, columns=columns)
+
+
+def node_counts(codes: pd.Series) -> np.ndarray:
+    """Number of nodes (``"type"`` values) in every AST of a column."""
+    return count_types(codes, {}, ["n_nodes"], "n_nodes")[:, 0]
+
+
+def _tree_walk(codes: pd.Series, type_to_category: dict) -> pd.DataFrame:
+    """Reference counts from parsing and walking every AST."""
+    counts = [ast_features(json.loads(code), type_to_category)
+              for code in codes]
+    return pd.DataFrame(
+        [[c.get("n_" + category, 0) for category in CATEGORIES]
+         + [c.get("n_nodes", 0)] for c in counts],
+        index=codes.index,
+        columns=["n_" + c for c in CATEGORIES] + ["n_nodes"],
+    )
+
+
+def dataset_codes(dataset: Path) -> dict:
+    """Every AST column in a dataset directory, by source name."""
+    sources = {}
+    for name in ["training.csv", "requests.csv"]:
+        if (dataset / name).exists():
+            sources[name] = read_table("traces", dataset / name)["code"]
+    if (dataset / "gold-standard.csv").exists():
+        gold = read_table("gold", dataset / "gold-standard.csv")
+        sources["gold from"] = gold["from"].dropna()
+        sources["gold to"] = gold["to"].dropna()
+    hints = sorted((dataset / "algorithms").glob("*/*/*.json"))
+    if hints:
+        sources["algorithms"] = pd.Series([p.read_text() for p in hints])
+    return sources
+
+
+def main():
+    """Check the byte scan against the tree walk and time both."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("datasets", nargs="*",
+                        default=[ROOT / "isnap-s16", ROOT / "isnap-f16-f17"])
+    args = parser.parse_args()
+
+    for dataset in map(Path, args.datasets):
+        type_to_category = load_type_to_category(
+            next(dataset.glob("*-grammar.json"))
+        )
+
+        for name, codes in dataset_codes(dataset).items():
+            start = time.perf_counter()
+            expected = _tree_walk(codes, type_to_category)
+            walk = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scanned = category_counts(codes, type_to_category, nodes=True)
+            scan = time.perf_counter() - start
+
+            mismatched = (scanned != expected).any(axis=1).sum()
+            print(f"{dataset.name}/{name}: {len(codes)} ASTs, "
+                  f"{mismatched} mismatched, walk {walk:.3f}s, "
+                  f"scan {scan:.3f}s ({walk / scan:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Bootstrap confidence intervals for comparing hint algorithms.
+
+Takes a score matrix with one row per hint request and one column per
+algorithm (e.g. ``CTD``, ``PQGram``, ``SourceCheck``), and resamples
+requests with replacement. All resamples are drawn at once as a single
+index array, turned into a (resamples x requests) count matrix, and
+reduced to per-algorithm means with one matrix product. Pairwise
+differences are therefore paired: every algorithm is scored on the same
+resampled requests.
+
+Usage::
+
+    python bootstrap.py scores.csv --strata assignmentID
+
+where ``scores.csv`` has ``algorithm``, ``assignmentID``, ``requestID``
+and ``score`` columns.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def score_matrix(scores: pd.DataFrame, fill_value: float = 0.0) -> pd.DataFrame:
+    """Pivot long-format scores into a request x algorithm matrix.
+
+    Args:
+        scores: One row per (algorithm, request) with ``algorithm``,
+            ``assignmentID``, ``requestID`` and ``score`` columns.
+        fill_value: Score for requests an algorithm produced no hints for.
+
+    Returns:
+        pd.DataFrame: Indexed by (assignmentID, requestID), one column per
+        algorithm.
+    """
+    return scores.pivot_table(
+        index=["assignmentID", "requestID"],
+        columns="algorithm",
+        values="score",
+        aggfunc="mean",
+        fill_value=fill_value,
+        observed=True,
+    )
+
+
+def resample_counts(strata: np.ndarray, n_resamples: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Draw bootstrap resamples of rows as a count matrix.
+
+    Rows are resampled within each stratum, so every resample keeps the
+    original number of requests per stratum.
+
+    Args:
+        strata: Stratum label of each row.
+        n_resamples: Number of bootstrap resamples.
+        rng: Random generator.
+
+    Returns:
+        np.ndarray: ``(n_resamples, n_rows)`` matrix whose entry ``[b, i]``
+        is how often row ``i`` was drawn in resample ``b``.
+    """
+    n = len(strata)
+    _, codes = np.unique(strata, return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes)
+    offsets = np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+    # For each output slot, draw a position inside its stratum's block
+    draws = (rng.random((n_resamples, n)) * sizes[codes[order]]).astype(np.int64)
+    rows = order[offsets + draws]
+
+    flat = rows + n * np.arange(n_resamples)[:, None]
+    return np.bincount(flat.ravel(), minlength=n_resamples * n).reshape(
+        n_resamples, n
+    )
+
+
+def bootstrap(matrix: pd.DataFrame, strata=None, n_resamples: int = 10_000,
+              confidence: float = 0.95, seed: int = 0) -> tuple:
+    """Bootstrap per-algorithm and pairwise-difference statistics.
+
+    Args:
+        matrix: Request x algorithm score matrix (see :func:`score_matrix`).
+        strata: Index level or array to stratify resampling by, e.g.
+            ``"assignmentID"``. ``None`` resamples all requests together.
+        n_resamples: Number of bootstrap resamples.
+        confidence: Width of the percentile confidence intervals.
+        seed: Seed for reproducible resampling.
+
+    Returns:
+        tuple: ``(algorithms, pairs)``. ``algorithms`` has the mean score
+        and confidence interval of each algorithm. ``pairs`` has, for each
+        unordered pair (``a`` before ``b`` in the matrix columns), the
+        mean difference ``a - b``, its confidence interval and a two-sided
+        bootstrap p-value; ``b - a`` is the negation.
+    """
+    if strata is None:
+        labels = np.zeros(len(matrix), dtype=np.int64)
+    elif isinstance(strata, str):
+        labels = matrix.index.get_level_values(strata).to_numpy()
+    else:
+        labels = np.asarray(strata)
+
+    rng = np.random.default_rng(seed)
+    counts = resample_counts(labels, n_resamples, rng)
+
+    scores = matrix.to_numpy(dtype=np.float64)
+    means = counts @ scores / len(scores)
+    diffs = means[:, :, None] - means[:, None, :]
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha], axis=0)
+    diff_low, diff_high = np.quantile(diffs, [alpha, 1 - alpha], axis=0)
+    p_values = np.minimum(
+        1.0,
+        2 * np.minimum((diffs <= 0).mean(axis=0), (diffs >= 0).mean(axis=0)),
+    )
+
+    names = list(matrix.columns)
+    observed = scores.mean(axis=0)
+    algorithms = pd.DataFrame({
+        "algorithm": names,
+        "mean": observed,
+        "ci_low": low,
+        "ci_high": high,
+    })
+
+    a, b = np.triu_indices(len(names), k=1)
+    pairs = pd.DataFrame({
+        "a": np.array(names)[a],
+        "b": np.array(names)[b],
+        "mean_diff": observed[a] - observed[b],
+        "ci_low": diff_low[a, b],
+        "ci_high": diff_high[a, b],
+        "p_value": p_values[a, b],
+    })
+
+    return algorithms, pairs
+
+
+def main():
+    """Print bootstrap intervals for a long-format score file."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scores")
+    parser.add_argument("--strata", default=None,
+                        help="index level to stratify by, e.g. assignmentID")
+    parser.add_argument("--resamples", type=int, default=10_000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    matrix = score_matrix(pd.read_csv(args.scores))
+
+    start = time.perf_counter()
+    algorithms, pairs = bootstrap(
+        matrix, args.strata, args.resamples, args.confidence, args.seed
+    )
+    elapsed = time.perf_counter() - start
+
+    print(algorithms.to_string(index=False))
+    print(pairs.to_string(index=False))
+    print(f"{args.resamples} resamples in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
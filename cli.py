@@ -0,0 +1,460 @@
+"""Command-line entry point for the dataset analyses.
+
+One command with a subcommand per analysis::
+
+    python cli.py load [isnap-s16] [--backend sqlite]
+    python cli.py features [isnap-f16-f17]
+    python cli.py history [isnap-s16] [--window K]
+    python cli.py evolution [isnap-f16-f17]
+    python cli.py ambiguity [isnap-f16-f17]
+    python cli.py hint-usage [prog-snap-2]
+    python cli.py score [isnap-s16] [--output scores.csv] [--resamples N]
+    python cli.py agreement [isnap-s16] [--output agreement.csv]
+
+Only the standard library is imported at startup. pandas, the dataset
+scripts and the shared modules are imported inside the subcommand that
+uses them, so ``--help`` and argument errors return immediately.
+
+Intermediate tables are pickled under ``.cache/``, keyed by the size and
+modification time of the files they were computed from and of the source
+files of the code that computed them, and reused until one of those files
+changes. ``--no-cache`` recomputes everything.
+"""
+import argparse
+import hashlib
+import pickle
+from pathlib import Path
+
+from scripts import import_script
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / ".cache"
+
+# Files written by `corpus.py ingest` (see corpus.DEFAULT_DB)
+CORPUS_FILES = [ROOT / "corpus.sqlite", ROOT / "corpus.sqlite-wal"]
+
+# Shared modules imported by each script a subcommand runs, relative to
+# ROOT; their sources are part of every cache key that names the script
+IMPORTS = {
+    "isnap-s16/program.py": ["corpus.py", "schema.py"],
+    "isnap-f16-f17/request.py": ["ast_scan.py", "schema.py"],
+    "isnap-f16-f17/training.py": ["ast_scan.py", "schema.py"],
+    "isnap-f16-f17/analysis.py": ["ast_scan.py", "schema.py"],
+    "prog-snap-2/program.py": ["corpus.py", "schema.py"],
+    "agreement.py": ["corpus.py", "hint_graph.py", "schema.py"],
+    "hint_graph.py": ["schema.py"],
+}
+
+# Whether intermediates are read from and written to CACHE_DIR
+use_cache = True
+
+
+def code_files(scripts: list) -> list:
+    """Source files behind a result computed with ``scripts``.
+
+    This file is always included, since the compute functions live here.
+    """
+    files = {"cli.py", "scripts.py"}
+    for script in scripts:
+        files.add(script)
+        files.update(IMPORTS.get(script, []))
+    return [ROOT / file for file in sorted(files)]
+
+
+def cached(name: str, inputs: list, compute, code: list = ()):
+    """Return ``compute()``, reusing a pickled result for unchanged inputs.
+
+    Args:
+        name: Name of the intermediate, e.g. ``"traces"``.
+        inputs: Files (or directories, compared by their own mtime and by
+            the files below them) the result was computed from.
+        compute: Zero-argument function producing the result.
+        code: Scripts and modules (relative to the repository root)
+            ``compute`` runs; see :func:`code_files`.
+    """
+    stamp = hashlib.blake2b(name.encode(), digest_size=16)
+    for path in list(inputs) + code_files(code):
+        path = Path(path).resolve()
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            # Missing inputs are left for compute() to report
+            if file.exists():
+                stat = file.stat()
+                stamp.update(
+                    f"{file}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                )
+
+    cache_file = CACHE_DIR / f"{name}-{stamp.hexdigest()}.pkl"
+    if use_cache and cache_file.exists():
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+
+    result = compute()
+    if use_cache:
+        CACHE_DIR.mkdir(exist_ok=True)
+        for stale in CACHE_DIR.glob(f"{name}-*.pkl"):
+            stale.unlink()
+        with open(cache_file, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return result
+
+
+def sources(paths: list, backend: str) -> list:
+    """Files a table read with ``backend`` depends on, for :func:`cached`."""
+    return paths + CORPUS_FILES if backend == "sqlite" else paths
+
+
+# --------------------------------------------------
+# iSnap S16: unified traces and hints
+# --------------------------------------------------
+
+def load_traces(dataset: Path, backend: str = "csv"):
+    """Training and request snapshots with parsed ASTs, in one frame."""
+    def compute():
+        import pandas as pd
+        program = import_script("isnap-s16/program.py")
+
+        return pd.concat([
+            program.load_traces(str(dataset / "training.csv"), "training",
+                                backend),
+            program.load_traces(str(dataset / "requests.csv"), "request",
+                                backend),
+        ], ignore_index=True)
+
+    return cached(
+        f"traces-{dataset.name}-{backend}",
+        sources([dataset / "training.csv", dataset / "requests.csv"], backend),
+        compute,
+        code=["isnap-s16/program.py"],
+    )
+
+
+def load_hints(dataset: Path, backend: str = "csv"):
+    """Generated and gold hints, as loaded by ``isnap-s16/program.py``."""
+    def compute():
+        import pandas as pd
+        program = import_script("isnap-s16/program.py")
+
+        return pd.concat([
+            program.load_generated_hints(str(dataset / "algorithms"),
+                                         backend),
+            program.load_gold_hints(str(dataset / "gold-standard.csv"),
+                                    backend),
+        ], ignore_index=True)
+
+    return cached(
+        f"hints-{dataset.name}-{backend}",
+        sources([dataset / "algorithms", dataset / "gold-standard.csv"],
+                backend),
+        compute,
+        code=["isnap-s16/program.py"],
+    )
+
+
+def cmd_load(args):
+    traces = load_traces(args.dataset, args.backend)
+    hints = load_hints(args.dataset, args.backend)
+
+    print("Unified traces:", traces.shape)
+    print("Unified hints:", hints.shape)
+    print("Algorithms:", hints["algorithm"].unique())
+
+
+def hint_scores(dataset: Path, backend: str = "csv"):
+    """Score every generated hint against the gold-standard hints.
+
+    A hint scores 1 when its target AST is identical (ignoring node ids)
+    to the target of any tutor hint for the same request, and 0 otherwise.
+    The score of an (algorithm, request) pair is the mean over its hints.
+
+    Returns:
+        pd.DataFrame: ``algorithm``, ``assignmentID``, ``requestID`` and
+        ``score`` columns, the input format of ``bootstrap.py``.
+    """
+    def compute():
+        from hint_graph import state_key
+
+        hints = load_hints(dataset, backend)
+        hints = hints.assign(to_key=hints["to_ast"].map(state_key))
+
+        gold = hints[hints["source"] == "gold"]
+        generated = hints[hints["source"] == "generated"]
+
+        gold_keys = gold[["assignmentID", "requestID", "to_key"]]
+        matched = generated.merge(
+            gold_keys.drop_duplicates().assign(score=1.0),
+            on=["assignmentID", "requestID", "to_key"],
+            how="left",
+        )
+
+        # Only requests that tutors annotated can be scored
+        annotated = gold_keys[["assignmentID", "requestID"]].drop_duplicates()
+        matched = matched.merge(annotated, on=["assignmentID", "requestID"])
+
+        return (
+            matched
+            .fillna({"score": 0.0})
+            .groupby(["algorithm", "assignmentID", "requestID"])
+            .agg(score=("score", "mean"))
+            .reset_index()
+        )
+
+    return cached(
+        f"scores-{dataset.name}-{backend}",
+        sources([dataset / "algorithms", dataset / "gold-standard.csv"],
+                backend),
+        compute,
+        code=["isnap-s16/program.py", "hint_graph.py"],
+    )
+
+
+def cmd_score(args):
+    scores = hint_scores(args.dataset, args.backend)
+
+    if args.output:
+        scores.to_csv(args.output, index=False)
+
+    print(
+        scores
+        .groupby("algorithm")["score"]
+        .agg(["mean", "count"])
+    )
+
+    if args.resamples:
+        from bootstrap import bootstrap, score_matrix
+
+        algorithms, pairs = bootstrap(
+            score_matrix(scores), "assignmentID", args.resamples
+        )
+        print(algorithms.to_string(index=False))
+        print(pairs.to_string(index=False))
+
+
+def cmd_agreement(args):
+    dataset, backend = args.dataset, args.backend
+
+    def compute():
+        import pandas as pd
+        import agreement
+
+        hints = agreement.hint_files(str(dataset / "algorithms"), backend)
+        if (dataset / "gold-standard.csv").exists():
+            hints = pd.concat(
+                [hints, agreement.gold_hints(dataset / "gold-standard.csv")],
+                ignore_index=True,
+            )
+        return agreement.agreement(agreement.hint_keys(hints))
+
+    pairs, duplicates = cached(
+        f"agreement-{dataset.name}-{backend}",
+        sources([dataset / "algorithms", dataset / "gold-standard.csv"],
+                backend),
+        compute,
+        code=["agreement.py"],
+    )
+
+    if args.output:
+        pairs.to_csv(args.output, index=False)
+
+    from agreement import agreement_matrix
+    print(agreement_matrix(pairs).round(3).to_string())
+    print(duplicates.to_string(index=False))
+
+
+# --------------------------------------------------
+# iSnap F16-F17: grammar features
+# --------------------------------------------------
+
+def read_traces(path: Path):
+    """Snapshot CSV as loaded by ``schema.read_table``."""
+    def compute():
+        from schema import read_table
+        return read_table("traces", path)
+
+    return cached(f"read-{path.parent.name}-{path.stem}", [path], compute,
+                  code=["schema.py"])
+
+
+def cmd_features(args):
+    from ast_scan import grammar_path, load_type_to_category
+
+    request = import_script("isnap-f16-f17/request.py")
+
+    def compute():
+        type_to_category = load_type_to_category(
+            grammar_path(args.dataset)
+        )
+        requests = read_traces(args.dataset / "requests.csv")
+        return request.request_features(
+            request.request_states(requests), type_to_category
+        )
+
+    features = cached(
+        f"features-{args.dataset.name}",
+        [args.dataset / "requests.csv", grammar_path(args.dataset)],
+        compute,
+        code=["isnap-f16-f17/request.py"],
+    )
+
+    print(features.info())
+    print(features.head())
+
+
+def cmd_history(args):
+    from ast_scan import grammar_path, load_type_to_category
+
+    request = import_script("isnap-f16-f17/request.py")
+
+    def compute():
+        type_to_category = load_type_to_category(
+            grammar_path(args.dataset)
+        )
+        return request.request_history(
+            read_traces(args.dataset / "requests.csv"), type_to_category,
+            args.window,
+        )
+
+    history = cached(
+        f"history-{args.dataset.name}-{args.window}",
+        [args.dataset / "requests.csv", grammar_path(args.dataset)],
+        compute,
+        code=["isnap-f16-f17/request.py"],
+    )
+
+    print(history.head())
+    print(history.describe().T)
+
+
+def cmd_evolution(args):
+    from ast_scan import grammar_path, load_type_to_category
+
+    training = import_script("isnap-f16-f17/training.py")
+
+    def compute():
+        type_to_category = load_type_to_category(
+            grammar_path(args.dataset)
+        )
+        return training.grammar_features(
+            read_traces(args.dataset / "training.csv"), type_to_category
+        )
+
+    features = cached(
+        f"training-features-{args.dataset.name}",
+        [args.dataset / "training.csv", grammar_path(args.dataset)],
+        compute,
+        code=["isnap-f16-f17/training.py"],
+    )
+
+    print(training.evolution(features))
+
+
+def cmd_ambiguity(args):
+    from ast_scan import grammar_path
+
+    analysis = import_script("isnap-f16-f17/analysis.py")
+
+    def compute():
+        return analysis.request_ambiguity(
+            read_traces(args.dataset / "training.csv"),
+            read_traces(args.dataset / "requests.csv"),
+            analysis.SnapGrammar(grammar_path(args.dataset)),
+            analysis.GoldStandard(args.dataset / "gold-standard.csv"),
+        )
+
+    _, request_with_gold = cached(
+        f"ambiguity-{args.dataset.name}",
+        [
+            args.dataset / "training.csv",
+            args.dataset / "requests.csv",
+            args.dataset / "gold-standard.csv",
+            grammar_path(args.dataset),
+        ],
+        compute,
+        code=["isnap-f16-f17/analysis.py"],
+    )
+
+    print(request_with_gold.head())
+    print(
+        request_with_gold
+        .groupby("n_gold_hints")[["n_COMMAND", "n_REPORTER"]]
+        .mean()
+    )
+
+
+# --------------------------------------------------
+# ProgSnap2: hint usage
+# --------------------------------------------------
+
+def cmd_hint_usage(args):
+    program = import_script("prog-snap-2/program.py")
+    path = args.dataset / "MainTable.csv"
+
+    def compute():
+        if args.backend == "sqlite":
+            import corpus
+            main_df = corpus.read_table("main", path)
+        else:
+            main_df = program.read_table("main", path)
+        return program.hint_usage(main_df)
+
+    print(cached(f"hint-usage-{args.dataset.name}-{args.backend}",
+                 sources([path], args.backend), compute,
+                 code=["prog-snap-2/program.py"]))
+
+
+def main(argv=None):
+    global use_cache
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute instead of reusing .cache/")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add(name, func, dataset, help, backend=False):
+        sub = subparsers.add_parser(name, help=help)
+        sub.add_argument("dataset", nargs="?", type=Path,
+                         default=ROOT / dataset,
+                         help=f"dataset directory (default: {dataset})")
+        if backend:
+            sub.add_argument("--backend", choices=["csv", "sqlite"],
+                             default="csv",
+                             help="read CSV files or the corpus.py store")
+        sub.set_defaults(func=func)
+        return sub
+
+    add("load", cmd_load, "isnap-s16",
+        "load unified traces and hints", backend=True)
+    add("features", cmd_features, "isnap-f16-f17",
+        "grammar features of each hint request")
+    history = add("history", cmd_history, "isnap-s16",
+                  "edit history leading up to each hint request")
+    history.add_argument("--window", type=int, default=5,
+                         help="snapshots over which deltas are taken")
+    add("evolution", cmd_evolution, "isnap-f16-f17",
+        "structural evolution across training traces")
+    add("ambiguity", cmd_ambiguity, "isnap-f16-f17",
+        "request features with gold-standard ambiguity")
+    add("hint-usage", cmd_hint_usage, "prog-snap-2",
+        "students who used hints", backend=True)
+
+    score = add("score", cmd_score, "isnap-s16",
+                "score generated hints against gold hints", backend=True)
+    score.add_argument("--output", default=None,
+                       help="write long-format scores for bootstrap.py")
+    score.add_argument("--resamples", type=int, default=0,
+                       help="also print bootstrap intervals")
+
+    agreement = add("agreement", cmd_agreement, "isnap-s16",
+                    "agreement and duplicates between hint algorithms",
+                    backend=True)
+    agreement.add_argument("--output", default=None,
+                           help="write per-request agreement as CSV")
+
+    args = parser.parse_args(argv)
+    use_cache = not args.no_cache
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""Indexed SQLite store for every dataset in this repository.
+
+``python corpus.py ingest`` loads training/request traces, gold-standard
+hints, generated hints under ``algorithms/``, hint ratings, grades,
+AssignmentSubject and ProgSnap2 MainTable events into one database
+(``corpus.sqlite`` in the repository root by default). ASTs are stored once
+each as zlib-compressed blobs keyed by a content hash. Re-running ingest
+only reloads files whose size or modification time changed, and drops
+rows for files that have been removed.
+
+Loaders read back through :func:`read_table` and :func:`read_hint_files`,
+which return the same frames as reading the original CSV/JSON files, keyed
+by the original file path.
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+from schema import column_dtypes, project, read_table as read_csv_table
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_DB = ROOT / "corpus.sqlite"
+DEFAULT_DATASETS = ["isnap-s16", "isnap-f16-f17", "isnap-f16", "prog-snap-2"]
+
+# (schema name, glob pattern relative to a dataset directory)
+DATASET_FILES = [
+    ("traces", "training.csv"),
+    ("traces", "requests.csv"),
+    ("gold", "gold-standard.csv"),
+    ("ratings", "ratings.csv"),
+    ("grades", "grades/*.csv"),
+    ("assignment_subject", "LinkTables/AssignmentSubject.csv"),
+    ("main", "MainTable.csv"),
+    ("hints", "algorithms/*/*/*.json"),
+]
+
+# Tables holding rows for each schema; tables not created by SCHEMA_SQL
+# are created by pandas on first insert.
+TABLES = {
+    "traces": "traces",
+    "gold": "gold_hints",
+    "hints": "generated_hints",
+    "ratings": "ratings",
+    "grades": "grades",
+    "assignment_subject": "assignment_subject",
+    "main": "events",
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS files (
+    source_file TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS traces (
+    source_file TEXT NOT NULL,
+    assignmentID TEXT NOT NULL,
+    traceID TEXT NOT NULL,
+    "index" INTEGER NOT NULL,
+    isCorrect INTEGER,
+    source TEXT,
+    code_hash BLOB
+);
+CREATE INDEX IF NOT EXISTS traces_trace
+    ON traces (assignmentID, traceID, "index");
+CREATE INDEX IF NOT EXISTS traces_file ON traces (source_file);
+CREATE TABLE IF NOT EXISTS gold_hints (
+    source_file TEXT NOT NULL,
+    assignmentID TEXT NOT NULL,
+    requestID TEXT NOT NULL,
+    year TEXT,
+    hintID INTEGER,
+    OneTutor INTEGER,
+    MultipleTutors INTEGER,
+    Consensus INTEGER,
+    priority INTEGER,
+    from_hash BLOB,
+    to_hash BLOB
+);
+CREATE INDEX IF NOT EXISTS gold_request
+    ON gold_hints (assignmentID, requestID);
+CREATE INDEX IF NOT EXISTS gold_file ON gold_hints (source_file);
+CREATE TABLE IF NOT EXISTS generated_hints (
+    source_file TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    assignmentID TEXT NOT NULL,
+    requestID TEXT NOT NULL,
+    hint_index TEXT,
+    hint_hash BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generated_algorithm
+    ON generated_hints (algorithm);
+CREATE INDEX IF NOT EXISTS generated_request
+    ON generated_hints (assignmentID, requestID);
+CREATE TABLE IF NOT EXISTS grades (
+    source_file TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    "Project ID" TEXT,
+    "Graded ID" INTEGER,
+    objective TEXT NOT NULL,
+    objective_order INTEGER NOT NULL,
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS grades_file ON grades (source_file);
+"""
+
+# Indexes on pandas-created tables, applied once the table exists
+LATE_INDEXES = {
+    "ratings": ["source_file"],
+    "assignment_subject": ["source_file", "SubjectID"],
+    "events": ["source_file", "SubjectID"],
+}
+
+# Columns holding AST JSON, replaced by blob hashes in the store
+AST_COLUMNS = {
+    "traces": {"code": "code_hash"},
+    "gold": {"from": "from_hash", "to": "to_hash"},
+}
+
+# Rows of large CSVs (e.g. MainTable.csv) are ingested in chunks
+CHUNKSIZE = 500_000
+
+
+def source_key(path) -> str:
+    """Identify a file by its path relative to the repository root."""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def content_hash(text: str) -> bytes:
+    """128-bit content hash used as the key of a stored blob."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def connect(db_path=DEFAULT_DB) -> sqlite3.Connection:
+    """Open (and if needed initialise) the corpus database."""
+    conn = sqlite3.connect(db_path)
+    # Ingest commits once per file; WAL keeps those commits cheap
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def connect_readonly(db_path=DEFAULT_DB) -> sqlite3.Connection:
+    """Open an existing corpus database for reading.
+
+    Raises:
+        FileNotFoundError: If there is no database at ``db_path``, e.g.
+            because ``python corpus.py ingest`` was never run.
+    """
+    db_path = Path(db_path).resolve()
+    if not db_path.exists():
+        raise FileNotFoundError(
+            f"No corpus database at {db_path}; run `python corpus.py ingest`"
+        )
+
+    return sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+
+
+def _ingested(conn, key: str, kind: str) -> bool:
+    """Whether a file (or, for a key ending in "/", any file below that
+    directory) was ingested as ``kind``."""
+    if key.endswith("/"):
+        row = conn.execute(
+            "SELECT 1 FROM files WHERE kind = ? "
+            "AND substr(source_file, 1, ?) = ? LIMIT 1",
+            (kind, len(key), key),
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT 1 FROM files WHERE kind = ? AND source_file = ?",
+            (kind, key),
+        ).fetchone()
+    return row is not None
+
+
+def _store_blobs(conn, texts: pd.Series) -> list:
+    """Insert missing blobs and return the hash of each text (or None)."""
+    hashes = []
+    new = {}
+    for text in texts:
+        if pd.isna(text):
+            hashes.append(None)
+            continue
+        key = content_hash(text)
+        hashes.append(key)
+        new.setdefault(key, text)
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO blobs VALUES (?, ?)",
+        ((key, zlib.compress(text.encode("utf-8"))) for key, text in new.items()),
+    )
+    return hashes
+
+
+def _load_blobs(conn, hashes: pd.Series) -> pd.Series:
+    """Decompress the blobs for a column of hashes."""
+    keys = list({key for key in hashes if key is not None})
+    texts = {}
+    # Stay below SQLite's bound-parameter limit
+    for i in range(0, len(keys), 900):
+        batch = keys[i:i + 900]
+        marks = ",".join("?" * len(batch))
+        for key, data in conn.execute(
+            f"SELECT hash, data FROM blobs WHERE hash IN ({marks})", batch
+        ):
+            texts[key] = zlib.decompress(data).decode("utf-8")
+    return hashes.map(texts, na_action="ignore")
+
+
+def _ingest_csv(conn, name: str, path: Path, key: str):
+    """Insert the rows of one CSV file under the given schema."""
+    table = TABLES[name]
+
+    if name == "main":
+        chunks = read_csv_table(name, path, chunksize=CHUNKSIZE)
+    else:
+        # Keep every column, not just the default projection
+        header = pd.read_csv(path, nrows=0).columns
+        chunks = [read_csv_table(name, path, columns=list(header))]
+
+    for df in chunks:
+        df = df.astype({col: "object" for col in df.select_dtypes("category")})
+        df.insert(0, "source_file", key)
+
+        for column, hash_column in AST_COLUMNS.get(name, {}).items():
+            df[hash_column] = _store_blobs(conn, df.pop(column))
+
+        if name == "grades":
+            # Long format, since every assignment has its own objectives
+            df = (
+                df.rename_axis("row").reset_index()
+                .melt(
+                    id_vars=["source_file", "row", "Project ID", "Graded ID"],
+                    var_name="objective",
+                    value_name="score",
+                )
+                .assign(objective_order=lambda d: pd.factorize(
+                    d["objective"])[0])
+            )
+
+        df.to_sql(table, conn, if_exists="append", index=False)
+
+    for column in LATE_INDEXES.get(table, []):
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{column}" '
+            f'ON "{table}" ("{column}")'
+        )
+
+
+def _ingest_hint(conn, path: Path, key: str):
+    """Insert one generated hint file from ``algorithms/``."""
+    with open(path) as f:
+        text = json.dumps(json.load(f), sort_keys=True, separators=(",", ":"))
+
+    # <requestID>_<n>.json, or just <requestID>.json
+    request_id, _, hint_index = path.stem.partition("_")
+
+    (hint_hash,) = _store_blobs(conn, pd.Series([text]))
+    conn.execute(
+        "INSERT INTO generated_hints VALUES (?, ?, ?, ?, ?, ?)",
+        (key, path.parent.parent.name, path.parent.name, request_id,
+         hint_index or None, hint_hash),
+    )
+
+
+def _delete_file(conn, kind: str, key: str):
+    """Remove every row that was ingested from a file."""
+    table = TABLES[kind]
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,),
+    ).fetchone()
+    if exists:
+        conn.execute(f'DELETE FROM "{table}" WHERE source_file = ?', (key,))
+    conn.execute("DELETE FROM files WHERE source_file = ?", (key,))
+
+
+def _collect_garbage(conn):
+    """Drop blobs no longer referenced by any row."""
+    conn.execute("""
+        DELETE FROM blobs WHERE hash NOT IN (
+            SELECT code_hash FROM traces WHERE code_hash IS NOT NULL
+            UNION SELECT from_hash FROM gold_hints WHERE from_hash IS NOT NULL
+            UNION SELECT to_hash FROM gold_hints WHERE to_hash IS NOT NULL
+            UNION SELECT hint_hash FROM generated_hints
+        )
+    """)
+
+
+def ingest(directories, db_path=DEFAULT_DB) -> dict:
+    """Ingest dataset directories, reloading only files that changed.
+
+    Args:
+        directories: Dataset directories (e.g. ``isnap-s16``) to scan for
+            the files listed in ``DATASET_FILES``.
+        db_path: Path to the SQLite database.
+
+    Returns:
+        dict: Counts of ``loaded``, ``unchanged`` and ``removed`` files.
+    """
+    conn = connect(db_path)
+    known = {
+        key: (kind, size, mtime)
+        for key, kind, size, mtime in conn.execute("SELECT * FROM files")
+    }
+    stats = {"loaded": 0, "unchanged": 0, "removed": 0}
+
+    for directory in directories:
+        directory = Path(directory)
+        prefix = source_key(directory) + "/"
+        seen = set()
+
+        for kind, pattern in DATASET_FILES:
+            for path in sorted(directory.glob(pattern)):
+                key = source_key(path)
+                stat = path.stat()
+                seen.add(key)
+
+                if known.get(key) == (kind, stat.st_size, stat.st_mtime_ns):
+                    stats["unchanged"] += 1
+                    continue
+
+                try:
+                    with conn:
+                        _delete_file(conn, kind, key)
+                        if kind == "hints":
+                            _ingest_hint(conn, path, key)
+                        else:
+                            _ingest_csv(conn, kind, path, key)
+                        conn.execute(
+                            "INSERT INTO files VALUES (?, ?, ?, ?)",
+                            (key, kind, stat.st_size, stat.st_mtime_ns),
+                        )
+                except (pd.errors.ParserError, KeyError, ValueError) as e:
+                    print(f"Skipping {key}: {e}")
+                    continue
+                stats["loaded"] += 1
+
+        with conn:
+            for key, (kind, _, _) in known.items():
+                if key.startswith(prefix) and key not in seen:
+                    _delete_file(conn, kind, key)
+                    stats["removed"] += 1
+
+    if stats["loaded"] or stats["removed"]:
+        with conn:
+            _collect_garbage(conn)
+
+    conn.close()
+    return stats
+
+
+def read_table(name: str, path, columns: list = None,
+               db_path=DEFAULT_DB) -> pd.DataFrame:
+    """Read an ingested CSV back from the store.
+
+    Mirrors :func:`schema.read_table`: the result has the same columns and
+    dtypes as loading the original file.
+
+    Args:
+        name: Key of the schema in ``schema.SCHEMAS``.
+        path: Path of the original CSV file.
+        columns: Columns to load, as for :func:`schema.read_table`.
+        db_path: Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: The stored rows of that file.
+
+    Raises:
+        FileNotFoundError: If the database or the file is not in the
+            store.
+    """
+    conn = connect_readonly(db_path)
+    key = source_key(path)
+    table = TABLES[name]
+    if not _ingested(conn, key, name):
+        conn.close()
+        raise FileNotFoundError(f"{key} has not been ingested into {db_path}")
+
+    df = pd.read_sql(
+        f'SELECT * FROM "{table}" WHERE source_file = ?', conn, params=(key,)
+    ).drop(columns="source_file")
+
+    if name == "grades":
+        order = (
+            df.drop_duplicates("objective")
+              .sort_values("objective_order")["objective"]
+        )
+        scores = df.pivot(index="row", columns="objective", values="score")
+        df = (
+            df.drop_duplicates("row").set_index("row")
+              [["Project ID", "Graded ID"]]
+              .join(scores[list(order)])
+              .reset_index(drop=True)
+        )
+
+    for column, hash_column in AST_COLUMNS.get(name, {}).items():
+        df[column] = _load_blobs(conn, df.pop(hash_column))
+    conn.close()
+
+    usecols = project(name, df.columns, columns)
+    return df[usecols].astype(column_dtypes(name, usecols))
+
+
+def read_hint_files(algorithms_dir, db_path=DEFAULT_DB) -> pd.DataFrame:
+    """Read the ingested hint files under an ``algorithms`` directory.
+
+    Returns:
+        pd.DataFrame: One row per file with its ``path``, ``algorithm``,
+        ``assignmentID``, ``requestID``, ``hint_index``, file ``stem`` and
+        ``json`` text.
+
+    Raises:
+        FileNotFoundError: If the database is missing or holds no hint
+            files under ``algorithms_dir``.
+    """
+    conn = connect_readonly(db_path)
+    prefix = source_key(algorithms_dir) + "/"
+    if not _ingested(conn, prefix, "hints"):
+        conn.close()
+        raise FileNotFoundError(
+            f"No hint files under {prefix} have been ingested into {db_path}"
+        )
+
+    df = pd.read_sql(
+        "SELECT source_file AS path, algorithm, assignmentID, requestID, "
+        "hint_index, requestID || coalesce('_' || hint_index, '') AS stem, "
+        "hint_hash FROM generated_hints WHERE substr(source_file, 1, ?) = ? "
+        "ORDER BY source_file",
+        conn,
+        params=(len(prefix), prefix),
+    )
+    df["json"] = _load_blobs(conn, df.pop("hint_hash"))
+    conn.close()
+    return df
+
+
+def main():
+    """Command-line entry point: ``python corpus.py ingest [dirs...]``."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["ingest"])
+    parser.add_argument("directories", nargs="*",
+                        default=[ROOT / d for d in DEFAULT_DATASETS])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args()
+
+    stats = ingest(args.directories, args.db)
+    print(", ".join(f"{count} {label}" for label, count in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
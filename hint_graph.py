@@ -0,0 +1,348 @@
+"""Interaction-network hint generator for the hint rating datasets.
+
+Builds a state-transition graph from ``training.csv`` (canonicalised
+snapshots as nodes, observed transitions as weighted edges), precomputes
+the shortest distance from every state to a correct final state, and
+answers each hint request in ``requests.csv`` with dictionary lookups.
+
+Hints are written in the same ``algorithms/<name>/<assignment>/
+<requestID>_<n>.json`` layout as the externally generated hints, so they
+can be scored alongside them.
+
+Usage (from a dataset directory such as ``isnap-s16``)::
+
+    python ../hint_graph.py --name InteractionNetwork
+"""
+import argparse
+import hashlib
+import json
+import time
+from collections import Counter, defaultdict, deque
+from itertools import groupby
+from pathlib import Path
+
+import pandas as pd
+
+from schema import read_table
+
+# Written into every algorithms/<name> directory this script fills, so that
+# only those are ever cleaned; hints from external tools cannot be rebuilt
+MARKER = ".hint_graph"
+
+
+def state_key(ast: dict, keep_values: bool = True,
+              digest_size: int = 16) -> str:
+    """Compute a stable key for an AST, ignoring trace-specific node ids.
+
+    Children are visited in ``childrenOrder`` order and identified by their
+    position rather than their key, so trees whose children are keyed by
+    index (``"0"``, ``"1"``, as written by CTD or PQGram) and by field name
+    (``"body"``, ``"args"``, as in ITAP and the gold standard) agree.
+
+    Args:
+        ast: JSON representation of an abstract syntax tree.
+        keep_values: Whether user-defined ``value`` fields take part in
+            the key. Dropping them gives a coarser, structure-only key.
+        digest_size: Size of the hash in bytes, e.g. 8 for a 64-bit key.
+
+    Returns:
+        str: Hex digest identifying the canonical form of the AST.
+    """
+    parts = []
+
+    def visit(node):
+        if not isinstance(node, dict):
+            return
+
+        # JSON-quoted, so delimiters inside strings cannot be confused
+        # with the ones between nodes
+        parts.append(json.dumps(node.get("type")))
+        if keep_values and "value" in node:
+            parts.append("=" + json.dumps(node["value"]))
+
+        children = node.get("children", {})
+        order = node.get("childrenOrder") or list(children)
+
+        parts.append("(")
+        for key in order:
+            if key in children:
+                visit(children[key])
+                parts.append(",")
+        parts.append(")")
+
+    visit(ast)
+    return hashlib.blake2b(
+        "".join(parts).encode("utf-8"), digest_size=digest_size
+    ).hexdigest()
+
+
+def iter_traces(df: pd.DataFrame):
+    """Yield ``(assignmentID, traceID)`` and the ordered rows of each trace.
+
+    Args:
+        df: Snapshots with ``assignmentID``, ``traceID``, ``index``,
+            ``isCorrect`` and ``code`` columns.
+    """
+    df = df.sort_values(["assignmentID", "traceID", "index"])
+    rows = df.itertuples(index=False)
+    yield from groupby(rows, key=lambda row: (row.assignmentID, row.traceID))
+
+
+def trace_states(rows) -> list:
+    """Parse and key every snapshot of one trace.
+
+    Args:
+        rows: The trace's snapshots in ``index`` order, as yielded by
+            :func:`iter_traces`.
+
+    Returns:
+        list: ``(node, structure, ast, is_correct)`` per snapshot, where
+        ``node`` and ``structure`` are the exact and value-insensitive
+        ``(assignmentID, state_key)`` pairs.
+    """
+    states = []
+    for row in rows:
+        ast = json.loads(row.code)
+        states.append((
+            (row.assignmentID, state_key(ast)),
+            (row.assignmentID, state_key(ast, keep_values=False)),
+            ast,
+            bool(row.isCorrect),
+        ))
+    return states
+
+
+class HintGraph:
+    """Interaction network over training traces.
+
+    Nodes are ``(assignmentID, state_key)`` pairs. Edge weights count how
+    often students moved from one state to another. Traces can be added one
+    at a time with :meth:`add_trace`, which keeps distances to the goal
+    states up to date incrementally; :meth:`refresh` then ranks next steps
+    so that :meth:`hints` only performs dictionary lookups.
+    """
+
+    def __init__(self):
+        self.asts = {}
+        self.edges = defaultdict(Counter)
+        self.reverse = defaultdict(set)
+        self.goals = set()
+        self.distance = {}
+        self.structure_nodes = defaultdict(set)
+        self.next_steps = {}
+        self.structure_index = {}
+
+    @classmethod
+    def from_traces(cls, df: pd.DataFrame) -> "HintGraph":
+        """Build the graph from a training dataframe.
+
+        Args:
+            df: Training snapshots with ``assignmentID``, ``traceID``,
+                ``index``, ``isCorrect`` and ``code`` columns.
+
+        Returns:
+            HintGraph: Graph with distances and next steps precomputed.
+        """
+        graph = cls()
+        for _, rows in iter_traces(df):
+            graph.add_trace(trace_states(rows))
+        graph.refresh()
+        return graph
+
+    def add_trace(self, states: list):
+        """Add one trace's snapshots and update distances to goal states.
+
+        Args:
+            states: Output of :func:`trace_states` for the trace.
+        """
+        previous = None
+        for node, structure, ast, is_correct in states:
+            self.asts.setdefault(node, ast)
+            self.structure_nodes[structure].add(node)
+
+            if previous is not None and node != previous:
+                self.edges[previous][node] += 1
+                self.reverse[node].add(previous)
+                if node in self.distance:
+                    self._relax(node)
+
+            if is_correct and node not in self.goals:
+                self.goals.add(node)
+                self.distance[node] = 0
+                self._relax(node)
+
+            previous = node
+
+    def _relax(self, start):
+        """Propagate a shortened distance backwards along reversed edges."""
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            candidate = self.distance[node] + 1
+            for source in self.reverse[node]:
+                if candidate < self.distance.get(source, float("inf")):
+                    self.distance[source] = candidate
+                    queue.append(source)
+
+    def refresh(self):
+        """Rank next steps and resolve the structure index for lookups."""
+        self._rank_next_steps()
+        self._resolve_structure_index()
+
+    def _rank_next_steps(self):
+        """Order each state's successors by distance, then by frequency."""
+        self.next_steps = {}
+        for source, targets in self.edges.items():
+            if source in self.goals or source not in self.distance:
+                continue
+
+            closer = [
+                target for target in targets
+                if self.distance.get(target, float("inf"))
+                < self.distance[source]
+            ]
+            closer.sort(key=lambda t: (self.distance[t], -targets[t]))
+            self.next_steps[source] = closer
+
+    def _resolve_structure_index(self):
+        """Keep, per structure-only key, the state closest to a goal."""
+        self.structure_index = {}
+        for structure, nodes in self.structure_nodes.items():
+            candidates = [node for node in nodes if node in self.next_steps]
+            if candidates:
+                self.structure_index[structure] = min(
+                    candidates, key=lambda n: self.distance[n]
+                )
+
+    def lookup(self, node: tuple, structure: tuple, n_hints: int = 1) -> list:
+        """Next-step states for an already keyed request state.
+
+        Args:
+            node: Exact ``(assignmentID, state_key)`` of the request.
+            structure: Value-insensitive key of the request.
+            n_hints: Maximum number of states to return.
+
+        Returns:
+            list: Target nodes, best first. Empty if no match was found.
+        """
+        if node not in self.next_steps:
+            node = self.structure_index.get(structure)
+            if node is None:
+                return []
+        return self.next_steps[node][:n_hints]
+
+    def hints(self, assignment_id: str, ast: dict, n_hints: int = 1) -> list:
+        """Suggest next-step target ASTs for a hint request.
+
+        The request state is matched exactly first; if it was never
+        observed, the closest known state with the same structure (ignoring
+        user-defined values) is used instead.
+
+        Args:
+            assignment_id: Assignment of the hint request.
+            ast: AST of the student's code at the time of the request.
+            n_hints: Maximum number of hints to return.
+
+        Returns:
+            list: Target ASTs, best first. Empty if no match was found.
+        """
+        targets = self.lookup(
+            (assignment_id, state_key(ast)),
+            (assignment_id, state_key(ast, keep_values=False)),
+            n_hints,
+        )
+        return [self.asts[target] for target in targets]
+
+
+def final_snapshots(df: pd.DataFrame) -> pd.DataFrame:
+    """Select the final snapshot (the hint request) of each trace."""
+    return (
+        df.sort_values("index")
+          .groupby(["assignmentID", "traceID"], observed=True)
+          .tail(1)
+          .reset_index(drop=True)
+    )
+
+
+def write_hints(graph: HintGraph, requests: pd.DataFrame,
+                output_dir: Path, n_hints: int) -> list:
+    """Generate hints for every request and write them as JSON files.
+
+    Args:
+        graph: Prebuilt interaction network.
+        requests: Final request snapshots, one row per request.
+        output_dir: ``algorithms/<name>`` directory to write into. Hint
+            files from an earlier run of this generator are removed first.
+        n_hints: Maximum number of hints per request.
+
+    Returns:
+        list: Per-request lookup times in seconds.
+
+    Raises:
+        FileExistsError: If ``output_dir`` holds hint files that were not
+            written by this generator (e.g. ``algorithms/CTD``).
+    """
+    timings = []
+
+    marker = output_dir / MARKER
+    if not marker.exists() and any(output_dir.glob("*/*.json")):
+        raise FileExistsError(
+            f"{output_dir} holds hints from another generator; "
+            "choose a different --name"
+        )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+
+    # Hints from an earlier run (possibly with a larger n_hints) would be
+    # scored alongside the new ones
+    for stale in output_dir.glob("*/*.json"):
+        stale.unlink()
+
+    for row in requests.itertuples(index=False):
+        start = time.perf_counter()
+        hints = graph.hints(row.assignmentID, json.loads(row.code), n_hints)
+        timings.append(time.perf_counter() - start)
+
+        assignment_dir = output_dir / str(row.assignmentID)
+        assignment_dir.mkdir(parents=True, exist_ok=True)
+        for i, hint in enumerate(hints):
+            path = assignment_dir / f"{row.traceID}_{i:02d}.json"
+            with open(path, "w") as f:
+                json.dump(hint, f, indent=4)
+
+    return timings
+
+
+def main():
+    """Build the interaction network and write hints for all requests."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--training", default="training.csv")
+    parser.add_argument("--requests", default="requests.csv")
+    parser.add_argument("--algorithms-dir", default="algorithms")
+    parser.add_argument("--name", default="InteractionNetwork")
+    parser.add_argument("--n-hints", type=int, default=3)
+    args = parser.parse_args()
+
+    training = read_table("traces", args.training)
+    requests = final_snapshots(read_table("traces", args.requests))
+
+    start = time.perf_counter()
+    graph = HintGraph.from_traces(training)
+    build_time = time.perf_counter() - start
+
+    try:
+        timings = write_hints(
+            graph, requests, Path(args.algorithms_dir) / args.name,
+            args.n_hints,
+        )
+    except FileExistsError as e:
+        parser.error(str(e))
+
+    print(f"States: {len(graph.asts)}, goals: {len(graph.goals)}, "
+          f"built in {build_time:.2f}s")
+    print(f"Requests: {len(timings)}, "
+          f"mean lookup {1000 * sum(timings) / max(len(timings), 1):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import json
-from collections import defaultdict
+from pandas.api.types import union_categoricals
+
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ast_scan import category_counts, load_type_to_category  # noqa: E402
+from schema import read_table  # noqa: E402
 
 
 class SnapGrammar:
@@ -10,7 +17,6 @@ class SnapGrammar:
     Responsibilities:
     - Load the Snap grammar definition
     - Map AST node types to grammar categories
-    - Count grammar categories within an AST
     """
 
     def __init__(self, grammar_path):
@@ -22,49 +28,8 @@ class SnapGrammar:
         grammar_path : str
             Path to snap-grammar.json
         """
-        with open(grammar_path) as f:
-            grammar = json.load(f)
-
         # Map each node type to its corresponding grammar category
-        self.type_to_category = {}
-        for category, types in grammar["categories"].items():
-            for t in types:
-                self.type_to_category[t] = category
-
-    def count_categories(self, ast):
-        """
-        Count grammar categories present in an AST.
-
-        Parameters
-        ----------
-        ast : dict
-            JSON representation of a Snap! abstract syntax tree
-
-        Returns
-        -------
-        dict
-            Mapping from grammar category to frequency
-        """
-        counts = defaultdict(int)
-
-        def visit(node):
-            # Ignore malformed or non-dictionary nodes
-            if not isinstance(node, dict):
-                return
-
-            node_type = node.get("type")
-            category = self.type_to_category.get(node_type)
-
-            # Increment category count if applicable
-            if category:
-                counts[category] += 1
-
-            # Recursively visit child nodes
-            for child in node.get("children", {}).values():
-                visit(child)
-
-        visit(ast)
-        return counts
+        self.type_to_category = load_type_to_category(grammar_path)
 
 
 class TraceExtractor:
@@ -100,7 +65,7 @@ class TraceExtractor:
         """
         return (
             df.sort_values("index")
-              .groupby(["assignmentID", "traceID"])
+              .groupby(["assignmentID", "traceID"], observed=True)
               .tail(1)
               .reset_index(drop=True)
         )
@@ -123,28 +88,19 @@ class TraceExtractor:
         pandas.DataFrame
             Grammar feature representation of each program state
         """
-        rows = []
+        # Count node types straight from the JSON text, without parsing
+        df = df.reset_index(drop=True)
+        counts = category_counts(df["code"], self.grammar.type_to_category)
 
-        for _, row in df.iterrows():
-            ast = json.loads(row["code"])
-            counts = self.grammar.count_categories(ast)
-
-            record = {
-                "assignmentID": row["assignmentID"],
-                "state": state,
-                "n_COMMAND": counts.get("COMMAND", 0),
-                "n_REPORTER": counts.get("REPORTER", 0),
-                "n_HAT": counts.get("HAT", 0),
-                "n_BOOLEAN": counts.get("BOOLEAN", 0),
-            }
-
-            # Preserve traceID when analysing request-level ambiguity
-            if include_trace:
-                record["traceID"] = row["traceID"]
+        features = pd.concat(
+            [df[["assignmentID"]].assign(state=state), counts], axis=1
+        )
 
-            rows.append(record)
+        # Preserve traceID when analysing request-level ambiguity
+        if include_trace:
+            features["traceID"] = df["traceID"]
 
-        return pd.DataFrame(rows)
+        return features
 
 
 class GoldStandard:
@@ -160,7 +116,7 @@ class GoldStandard:
         path : str
             Path to gold-standard.csv
         """
-        self.gold = pd.read_csv(path)
+        self.gold = read_table("gold", path)
 
     def ambiguity_metrics(self):
         """
@@ -173,7 +129,7 @@ class GoldStandard:
         """
         return (
             self.gold
-            .groupby(["assignmentID", "requestID"])
+            .groupby(["assignmentID", "requestID"], observed=True)
             .agg(
                 n_gold_hints=("hintID", "count"),
                 n_multi_tutor=("MultipleTutors", "sum"),
@@ -187,50 +143,89 @@ class GoldStandard:
 # Main analysis pipeline
 # -------------------------
 
-# Load raw datasets
-training = pd.read_csv("training.csv")
-requests = pd.read_csv("requests.csv")
-
-# Initialise core components
-grammar = SnapGrammar("snap-grammar.json")
-extractor = TraceExtractor(grammar)
-gold = GoldStandard("gold-standard.csv")
-
-# Extract final states from training (correct solutions)
-correct_states = extractor.final_snapshots(training)
-
-# Extract final states from request traces (actual hint requests)
-request_states = extractor.final_snapshots(requests)
-
-# Compute grammar-aware features
-correct_features = extractor.extract_features(correct_states, "correct")
-request_features = extractor.extract_features(
-    request_states, "request", include_trace=True
-)
-
-# Combine correct and request states for structural comparison
-comparison_df = pd.concat(
-    [correct_features, request_features.drop(columns=["traceID"])],
-    ignore_index=True
-)
-
-# Compute gold-standard ambiguity metrics
-gold_summary = gold.ambiguity_metrics()
-
-# Merge ambiguity metrics onto request-level features
-# NOTE: traceID in requests corresponds one-to-one with requestID
-#       in gold-standard annotations (verified empirically)
-request_with_gold = request_features.merge(
-    gold_summary.rename(columns={"requestID": "traceID"}),
-    on=["assignmentID", "traceID"],
-    how="left"
-)
-
-print("Request-level structure + ambiguity:")
-print(request_with_gold.head())
-
-print(
-    request_with_gold
-    .groupby("n_gold_hints")[["n_COMMAND", "n_REPORTER"]]
-    .mean()
-)
+def request_ambiguity(training, requests, grammar, gold):
+    """
+    Attach gold-standard ambiguity metrics to request-level features.
+
+    Parameters
+    ----------
+    training : pandas.DataFrame
+        Training snapshots (correct solution traces)
+    requests : pandas.DataFrame
+        Request snapshots (hint request traces)
+    grammar : SnapGrammar
+        Grammar handler used for AST analysis
+    gold : GoldStandard
+        Gold-standard tutor annotations
+
+    Returns
+    -------
+    tuple of pandas.DataFrame
+        Correct vs. request structural comparison, and request-level
+        features merged with ambiguity metrics
+    """
+    extractor = TraceExtractor(grammar)
+
+    # Extract final states from training (correct solutions)
+    correct_states = extractor.final_snapshots(training)
+
+    # Extract final states from request traces (actual hint requests)
+    request_states = extractor.final_snapshots(requests)
+
+    # Compute grammar-aware features
+    correct_features = extractor.extract_features(correct_states, "correct")
+    request_features = extractor.extract_features(
+        request_states, "request", include_trace=True
+    )
+
+    # Combine correct and request states for structural comparison
+    parts = [correct_features, request_features.drop(columns=["traceID"])]
+    comparison_df = pd.concat(parts, ignore_index=True)
+
+    # pd.concat falls back to strings when the two files cover different
+    # assignments; keep such columns categorical over both sets of values
+    for col in comparison_df.columns:
+        columns = [part[col] for part in parts]
+        if all(isinstance(c.dtype, pd.CategoricalDtype) for c in columns):
+            comparison_df[col] = union_categoricals(
+                columns, sort_categories=True
+            )
+
+    # Compute gold-standard ambiguity metrics
+    gold_summary = gold.ambiguity_metrics()
+
+    # Merge ambiguity metrics onto request-level features
+    # NOTE: traceID in requests corresponds one-to-one with requestID
+    #       in gold-standard annotations (verified empirically)
+    request_with_gold = request_features.merge(
+        gold_summary.rename(columns={"requestID": "traceID"}),
+        on=["assignmentID", "traceID"],
+        how="left"
+    )
+
+    return comparison_df, request_with_gold
+
+
+def main():
+    # Load raw datasets
+    training = read_table("traces", "training.csv")
+    requests = read_table("traces", "requests.csv")
+
+    # Initialise core components
+    grammar = SnapGrammar("snap-grammar.json")
+    gold = GoldStandard("gold-standard.csv")
+
+    _, request_with_gold = request_ambiguity(training, requests, grammar, gold)
+
+    print("Request-level structure + ambiguity:")
+    print(request_with_gold.head())
+
+    print(
+        request_with_gold
+        .groupby("n_gold_hints")[["n_COMMAND", "n_REPORTER"]]
+        .mean()
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
-import json
-from collections import defaultdict
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ast_scan import category_counts, load_type_to_category  # noqa: E402
+from schema import read_table  # noqa: E402
+
 
 class SnapGrammar:
     """Grammar handler for Snap! abstract syntax trees.
 
-    This class loads a Snap grammar specification and provides utilities for
-    mapping AST node types to grammar categories and counting category
-    occurrences within an AST.
+    This class loads a Snap grammar specification and maps AST node types
+    to grammar categories.
     """
 
     def __init__(self, grammar_path):
@@ -18,39 +23,7 @@ class SnapGrammar:
             grammar_path (str): Path to the Snap grammar JSON file
                 (e.g. ``snap-grammar.json``).
         """
-        with open(grammar_path) as f:
-            grammar = json.load(f)
-
-        self.type_to_category = {}
-        for category, types in grammar["categories"].items():
-            for t in types:
-                self.type_to_category[t] = category
-
-    def count_categories(self, ast):
-        """Count grammar categories present in an AST.
-
-        Args:
-            ast (dict): JSON representation of a Snap! abstract syntax tree.
-
-        Returns:
-            dict: Mapping from grammar category name to occurrence count.
-        """
-        counts = defaultdict(int)
-
-        def visit(node):
-            if not isinstance(node, dict):
-                return
-
-            node_type = node.get("type")
-            category = self.type_to_category.get(node_type)
-            if category:
-                counts[category] += 1
-
-            for child in node.get("children", {}).values():
-                visit(child)
-
-        visit(ast)
-        return counts
+        self.type_to_category = load_type_to_category(grammar_path)
 
 
 class TraceExtractor:
@@ -84,7 +57,7 @@ class TraceExtractor:
         """
         return (
             df.sort_values("index")
-              .groupby(["assignmentID", "traceID"])
+              .groupby(["assignmentID", "traceID"], observed=True)
               .tail(1)
               .reset_index(drop=True)
         )
@@ -103,27 +76,18 @@ class TraceExtractor:
             pandas.DataFrame: Grammar feature representation of each program
             state.
         """
-        rows = []
-
-        for _, row in df.iterrows():
-            ast = json.loads(row["code"])
-            counts = self.grammar.count_categories(ast)
+        # Count node types straight from the JSON text, without parsing
+        df = df.reset_index(drop=True)
+        counts = category_counts(df["code"], self.grammar.type_to_category)
 
-            record = {
-                "assignmentID": row["assignmentID"],
-                "state": state,
-                "n_COMMAND": counts.get("COMMAND", 0),
-                "n_REPORTER": counts.get("REPORTER", 0),
-                "n_HAT": counts.get("HAT", 0),
-                "n_BOOLEAN": counts.get("BOOLEAN", 0),
-            }
-
-            if include_trace:
-                record["traceID"] = row["traceID"]
+        features = pd.concat(
+            [df[["assignmentID"]].assign(state=state), counts], axis=1
+        )
 
-            rows.append(record)
+        if include_trace:
+            features["traceID"] = df["traceID"]
 
-        return pd.DataFrame(rows)
+        return features
 
 
 class GoldStandard:
@@ -140,7 +104,7 @@ class GoldStandard:
         Args:
             path (str): Path to ``gold-standard.csv``.
         """
-        self.gold = pd.read_csv(path)
+        self.gold = read_table("gold", path)
 
     def ambiguity_metrics(self):
         """Compute hint ambiguity metrics per request.
@@ -151,7 +115,7 @@ class GoldStandard:
         """
         return (
             self.gold
-            .groupby(["assignmentID", "requestID"])
+            .groupby(["assignmentID", "requestID"], observed=True)
             .agg(
                 n_gold_hints=("hintID", "count"),
                 n_multi_tutor=("MultipleTutors", "sum"),
@@ -163,8 +127,8 @@ class GoldStandard:
 
 def main():
     """Run the grammar-aware structural and ambiguity analysis."""
-    training = pd.read_csv("training.csv")
-    requests = pd.read_csv("requests.csv")
+    training = read_table("traces", "training.csv")
+    requests = read_table("traces", "requests.csv")
 
     grammar = SnapGrammar("snap-grammar.json")
     extractor = TraceExtractor(grammar)
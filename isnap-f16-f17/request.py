@@ -1,82 +1,142 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import json
-from collections import defaultdict
-
-# load request data
-requests = pd.read_csv("requests.csv")
-
-# ensure correct ordering
-requests = requests.sort_values("index")
-
-# compute max index per trace FIRST
-requests["max_index"] = (
-    requests
-    .groupby(["assignmentID", "traceID"])["index"]
-    .transform("max")
-)
-
-# isolate the actual hint request (final snapshot per trace)
-request_states = (
-    requests
-    .groupby(["assignmentID", "traceID"])
-    .tail(1)
-    .reset_index(drop=True)
-)
-
-# compute relative position of the request within the trace
-request_states["request_progress"] = (
-    request_states["index"] / request_states["max_index"]
-)
-
-# load snap grammar
-with open("snap-grammar.json") as f:
-    grammar = json.load(f)
-
-# build mapping from node type to grammar category
-type_to_category = {}
-for category, types in grammar["categories"].items():
-    for t in types:
-        type_to_category[t] = category
-
-# grammar-aware AST traversal
-def count_categories(ast, type_to_category):
-    counts = defaultdict(int)
-
-    def visit(node):
-        if not isinstance(node, dict):
-            return
-
-        node_type = node.get("type")
-        category = type_to_category.get(node_type)
-
-        if category:
-            counts[category] += 1
-
-        for child in node.get("children", {}).values():
-            visit(child)
-
-    visit(ast)
-    return counts
-
-# extract grammar-aware features at request time
-rows = []
-
-for _, row in request_states.iterrows():
-    ast = json.loads(row["code"])
-    cat_counts = count_categories(ast, type_to_category)
-
-    rows.append({
-        "assignmentID": row["assignmentID"],
-        "traceID": row["traceID"],
-        "index": row["index"],
-        "request_progress": row["request_progress"],
-        "n_COMMAND": cat_counts.get("COMMAND", 0),
-        "n_REPORTER": cat_counts.get("REPORTER", 0),
-        "n_HAT": cat_counts.get("HAT", 0),
-        "n_BOOLEAN": cat_counts.get("BOOLEAN", 0),
-    })
-
-request_analysis_df = pd.DataFrame(rows)
-
-print(request_analysis_df.info())
-print(request_analysis_df.head())
\ No newline at end of file
+import numpy as np
+
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ast_scan import category_counts, load_type_to_category  # noqa: E402
+from schema import read_table  # noqa: E402
+
+# number of snapshots before the request over which deltas are taken
+HISTORY_WINDOW = 5
+
+
+# isolate the hint request (final snapshot) of each trace, with its
+# relative position within the trace
+def request_states(requests):
+    # ensure correct ordering
+    requests = requests.sort_values("index")
+
+    # compute max index per trace FIRST
+    requests["max_index"] = (
+        requests
+        .groupby(["assignmentID", "traceID"], observed=True)["index"]
+        .transform("max")
+    )
+
+    # isolate the actual hint request (final snapshot per trace)
+    states = (
+        requests
+        .groupby(["assignmentID", "traceID"], observed=True)
+        .tail(1)
+        .reset_index(drop=True)
+    )
+
+    # compute relative position of the request within the trace
+    states["request_progress"] = states["index"] / states["max_index"]
+
+    return states
+
+
+# extract grammar-aware features at request time, counting node types
+# straight from the JSON text instead of parsing each AST
+def request_features(states, type_to_category):
+    features = states[
+        ["assignmentID", "traceID", "index", "request_progress"]
+    ].reset_index(drop=True)
+
+    counts = category_counts(
+        states["code"].reset_index(drop=True), type_to_category
+    )
+
+    return pd.concat([features, counts], axis=1)
+
+
+# history of each trace leading up to its hint request, computed over all
+# snapshots at once (requests.csv has no timestamps, so time is measured in
+# snapshots). snapshots are sorted a single time, so a shift within a trace
+# is a positional offset clamped to the trace's first row
+def request_history(requests, type_to_category, k=HISTORY_WINDOW):
+    # sort the keys only; the code column is scanned in its own order
+    keys = requests[["assignmentID", "traceID", "index"]].reset_index(drop=True)
+    snapshots = keys.sort_values(
+        ["assignmentID", "traceID", "index"], kind="stable"
+    )
+    order = snapshots.index.to_numpy()
+    snapshots = snapshots.reset_index(drop=True)
+
+    codes = requests["code"].reset_index(drop=True)
+    counts = category_counts(codes, type_to_category, nodes=True)
+    values = counts.to_numpy()[order]
+
+    # a trace starts wherever the assignment or trace ID changes
+    is_first = np.zeros(len(snapshots), dtype=bool)
+    is_first[:1] = True
+    for column in ["assignmentID", "traceID"]:
+        ids = pd.factorize(snapshots[column])[0]
+        is_first[1:] |= ids[1:] != ids[:-1]
+    first = np.flatnonzero(is_first)
+    last = np.append(first[1:], len(snapshots))[:len(first)] - 1
+
+    # an edit changes the code text; a structural change changes the
+    # category or node counts; growth adds nodes
+    code = pd.factorize(codes)[0][order]
+    edited = np.append(False, code[1:] != code[:-1]) & ~is_first
+    structural = np.append(
+        False, (values[1:] != values[:-1]).any(axis=1)
+    ) & ~is_first
+    nodes = values[:, counts.columns.get_loc("n_nodes")]
+    grown = np.append(False, nodes[1:] > nodes[:-1]) & ~is_first
+
+    # row k snapshots before each request, or the first row of its trace
+    earlier = np.maximum(last - k, first)
+    edits = np.cumsum(edited)
+
+    # last row with a structural change (or growth); earlier traces'
+    # rows fall back to the trace's first row
+    rows = np.arange(len(snapshots))
+    last_change = np.maximum(
+        np.maximum.accumulate(np.where(structural, rows, 0))[last], first
+    )
+    last_growth = np.maximum(
+        np.maximum.accumulate(np.where(grown, rows, 0))[last], first
+    )
+
+    index = snapshots["index"].to_numpy()
+    history = snapshots.loc[last, ["assignmentID", "traceID", "index"]]
+    history = history.reset_index(drop=True).assign(
+        n_snapshots=last - first + 1,
+        n_edits=edits[last] - edits[first],
+        n_recent_edits=edits[last] - edits[earlier],
+        since_structural_change=index[last] - index[last_change],
+        stall_length=index[last] - index[last_growth],
+    )
+    deltas = pd.DataFrame(
+        values[last] - values[earlier],
+        columns=["delta_" + c for c in counts.columns],
+    )
+    return pd.concat([history, deltas], axis=1)
+
+
+def main():
+    # load request data
+    requests = read_table("traces", "requests.csv")
+
+    # load snap grammar
+    type_to_category = load_type_to_category("snap-grammar.json")
+
+    request_analysis_df = request_features(
+        request_states(requests), type_to_category
+    )
+
+    print(request_analysis_df.info())
+    print(request_analysis_df.head())
+
+    # history of each trace before its request
+    print(request_history(requests, type_to_category).describe())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,110 +1,113 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import json
-from collections import defaultdict
 import numpy as np
 
-training = pd.read_csv("training.csv")
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ast_scan import category_counts, load_type_to_category  # noqa: E402
+from schema import read_table  # noqa: E402
 
-with open("snap-grammar.json") as f:
-    grammar = json.load(f)
 
 # compute number of steps per trace (index starts at 0)
-steps_per_trace = (
-    training
-    .groupby(["assignmentID", "traceID"])
-    .agg(n_steps=("index", "max"))
-    .reset_index()
-)
-steps_per_trace["n_steps"] += 1
-
-print(
-    steps_per_trace
-    .groupby("assignmentID")["n_steps"]
-    .agg(["mean", "median"])
-)
-
-# build mapping from node type to grammar category
-type_to_category = {}
-for category, types in grammar["categories"].items():
-    for t in types:
-        type_to_category[t] = category
-
-# count grammar categories in an AST
-def count_categories(ast, type_to_category):
-    counts = defaultdict(int)
-
-    def visit(node):
-        if not isinstance(node, dict):
-            return
-
-        node_type = node.get("type")
-        category = type_to_category.get(node_type)
-
-        if category:
-            counts[category] += 1
-
-        for child in node.get("children", {}).values():
-            visit(child)
-
-    visit(ast)
-    return counts
+def steps_per_trace(training):
+    steps = (
+        training
+        .groupby(["assignmentID", "traceID"], observed=True)
+        .agg(n_steps=("index", "max"))
+        .reset_index()
+    )
+    steps["n_steps"] += 1
+    return steps
+
 
 # extract grammar-aware features for each snapshot
-rows = []
-
-for _, row in training.iterrows():
-    ast = json.loads(row["code"])
-    cat_counts = count_categories(ast, type_to_category)
-
-    rows.append({
-        "assignmentID": row["assignmentID"],
-        "traceID": row["traceID"],
-        "index": row["index"],
-        "n_COMMAND": cat_counts.get("COMMAND", 0),
-        "n_REPORTER": cat_counts.get("REPORTER", 0),
-        "n_HAT": cat_counts.get("HAT", 0),
-        "n_BOOLEAN": cat_counts.get("BOOLEAN", 0),
-    })
+def grammar_features(training, type_to_category):
+    features = training[
+        ["assignmentID", "traceID", "index"]
+    ].reset_index(drop=True)
 
-grammar_features = pd.DataFrame(rows)
+    counts = category_counts(
+        training["code"].reset_index(drop=True), type_to_category
+    )
 
-# compute normalised progress within each trace
-grammar_features["max_index"] = (
-    grammar_features
-    .groupby(["assignmentID", "traceID"])["index"]
-    .transform("max")
-)
+    return pd.concat([features, counts], axis=1)
 
-grammar_features["progress"] = (
-    grammar_features["index"] / grammar_features["max_index"]
-)
 
-# bin progress to stabilise aggregation
-grammar_features["progress_bin"] = pd.cut(
-    grammar_features["progress"],
-    bins=np.linspace(0, 1, 11),
-    include_lowest=True
-)
+# per (assignment, progress bin) sums of grammar features, which can be
+# added up across shards of the traces before taking means
+def evolution_partial(features):
+    features = features.copy()
 
-print(steps_per_trace.info())
+    # compute normalised progress within each trace
+    features["max_index"] = (
+        features
+        .groupby(["assignmentID", "traceID"], observed=True)["index"]
+        .transform("max")
+    )
 
+    features["progress"] = features["index"] / features["max_index"]
 
+    # bin progress to stabilise aggregation
+    features["progress_bin"] = pd.cut(
+        features["progress"],
+        bins=np.linspace(0, 1, 11),
+        include_lowest=True
+    )
 
+    return (
+        features
+        .groupby(["assignmentID", "progress_bin"], observed=True)
+        .agg(
+            sum_COMMAND=("n_COMMAND", "sum"),
+            sum_REPORTER=("n_REPORTER", "sum"),
+            sum_HAT=("n_HAT", "sum"),
+            n_snapshots=("index", "size"),
+        )
+        .reset_index()
+    )
 
-# aggregate structural evolution across traces
-evolution = (
-    grammar_features
-    .groupby(["assignmentID", "progress_bin"], observed=True)
-    .agg(
-        mean_COMMAND=("n_COMMAND", "mean"),
-        mean_REPORTER=("n_REPORTER", "mean"),
-        mean_HAT=("n_HAT", "mean"),
+
+# combine (concatenated) partial sums into mean features per bin
+def combine_evolution(partials):
+    totals = (
+        partials
+        .groupby(["assignmentID", "progress_bin"], observed=True)
+        [["sum_COMMAND", "sum_REPORTER", "sum_HAT", "n_snapshots"]]
+        .sum()
+        .reset_index()
     )
-    .reset_index()
-)
 
+    return pd.DataFrame({
+        "assignmentID": totals["assignmentID"],
+        "progress_bin": totals["progress_bin"],
+        "mean_COMMAND": totals["sum_COMMAND"] / totals["n_snapshots"],
+        "mean_REPORTER": totals["sum_REPORTER"] / totals["n_snapshots"],
+        "mean_HAT": totals["sum_HAT"] / totals["n_snapshots"],
+    })
+
+
+# aggregate structural evolution across traces
+def evolution(features):
+    return combine_evolution(evolution_partial(features))
+
+
+def main():
+    training = read_table("traces", "training.csv")
+    type_to_category = load_type_to_category("snap-grammar.json")
+
+    steps = steps_per_trace(training)
+    print(
+        steps
+        .groupby("assignmentID", observed=True)["n_steps"]
+        .agg(["mean", "median"])
+    )
+    print(steps.info())
 
+    print("\nEvolution (first few rows):")
+    print(evolution(grammar_features(training, type_to_category)).info())
 
 
-print("\nEvolution (first few rows):")
-print(evolution.info())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
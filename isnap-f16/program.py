@@ -1,21 +1,14 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-first_second_hints = pd.read_csv("ratings.csv")
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from schema import read_table  # noqa: E402
 
-first_second_hints.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
-dtype_map = {}
+# Column dtypes are declared in the "ratings" schema
+df = read_table("ratings", "ratings.csv")
 
-for idx, col in enumerate(first_second_hints.columns):
-    if idx in (0, 1, 4):
-        dtype_map[col] = "string"
-    elif idx == 9:
-        dtype_map[col] = "float64"
-    elif idx == 10:
-        dtype_map[col] = "boolean"
-    else:
-        dtype_map[col] = "Int64"
-
-df = first_second_hints.astype(dtype_map)
+df.columns = [col.strip().lower().replace(" ", "_") for col in df.columns]
 
 
 
@@ -1,7 +1,32 @@
 import json
+import sys
 from pathlib import Path
+
 import pandas as pd
 
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import corpus  # noqa: E402
+from schema import read_table  # noqa: E402
+
+
+def read_source(name: str, path: str, backend: str = "csv") -> pd.DataFrame:
+    """Reads a dataset CSV from disk or from the SQLite corpus store.
+
+    Args:
+        name: Schema name of the file (see ``schema.SCHEMAS``).
+        path: Path of the CSV file.
+        backend: ``"csv"`` to parse the file, or ``"sqlite"`` to read the
+            rows ingested from it by ``corpus.py ingest``.
+
+    Returns:
+        pd.DataFrame: The file's rows with schema dtypes applied.
+    """
+    if backend == "sqlite":
+        return corpus.read_table(name, path)
+    return read_table(name, path)
+
+
 def load_python_grammar(grammar_path: str) -> dict:
     """Loads Python grammer into a dataframe.
 
@@ -17,17 +42,18 @@ def load_python_grammar(grammar_path: str) -> dict:
         return json.load(file)
 
 
-def load_traces(csv_path: str, type: str) -> pd.DataFrame:
+def load_traces(csv_path: str, type: str, backend: str = "csv") -> pd.DataFrame:
     """Loads either training or request CSV file into a dataframe.
 
     Args:
         csv_path: CSV file name for training or request.
         type: Categorise the file as either training or request.
+        backend: Read from the ``"csv"`` file or the ``"sqlite"`` store.
 
     Returns:
         pd.DataFrame:
     """
-    df = pd.read_csv(csv_path)
+    df = read_source("traces", csv_path, backend)
 
     return pd.DataFrame({
         "type": type,
@@ -43,8 +69,8 @@ def load_traces(csv_path: str, type: str) -> pd.DataFrame:
 # Gold-standard tutor hints
 # --------------------------------------------------
 
-def load_gold_hints(gold_csv: str) -> pd.DataFrame:
-    df = pd.read_csv(gold_csv)
+def load_gold_hints(gold_csv: str, backend: str = "csv") -> pd.DataFrame:
+    df = read_source("gold", gold_csv, backend)
 
     # Keep only rows with valid from/to ASTs
     df = df[df["from"].notna() & df["to"].notna()]
@@ -90,50 +116,71 @@ def extract_target_ast(hint_json: dict) -> dict:
     raise KeyError(f"Unknown hint JSON format: {hint_json.keys()}")
 
 
-def load_generated_hints(algorithms_dir: str) -> pd.DataFrame:
-    records = []
-    algorithms_dir = Path(algorithms_dir)
+def iter_hint_files(algorithms_dir: str, backend: str = "csv"):
+    """Yields each generated hint file under an algorithms directory.
 
-    for algorithm_dir in algorithms_dir.iterdir():
+    Args:
+        algorithms_dir: Directory laid out as
+            ``<algorithm>/<assignmentID>/<requestID>_<n>.json``.
+        backend: Read the ``"csv"`` (on-disk JSON) files or the
+            ``"sqlite"`` store.
+
+    Yields:
+        tuple: ``(algorithm, assignmentID, path, stem, hint_json)``.
+    """
+    if backend == "sqlite":
+        files = corpus.read_hint_files(algorithms_dir)
+        for row in files.itertuples(index=False):
+            yield (row.algorithm, row.assignmentID, row.path, row.stem,
+                   json.loads(row.json))
+        return
+
+    for algorithm_dir in Path(algorithms_dir).iterdir():
         if not algorithm_dir.is_dir():
             continue
 
-        algorithm = algorithm_dir.name
-
         for assignment_dir in algorithm_dir.iterdir():
             if not assignment_dir.is_dir():
                 continue
 
-            assignmentID = assignment_dir.name
-
             for hint_file in assignment_dir.glob("*.json"):
                 with open(hint_file, "r") as f:
                     hint_json = json.load(f)
 
-                try:
-                    to_ast = extract_target_ast(hint_json)
-                except KeyError as e:
-                    print(f"Skipping {hint_file}: {e}")
-                    continue
-
-                stem = hint_file.stem
-                if "_" in stem:
-                    requestID, hint_index = stem.split("_", 1)
-                    hint_index = int(hint_index)
-                else:
-                    requestID = stem
-                    hint_index = None
-
-                records.append({
-                    "source": "generated",
-                    "algorithm": algorithm,
-                    "assignmentID": assignmentID,
-                    "requestID": str(requestID),
-                    "hint_index": hint_index,
-                    "from_ast": None,        # filled later
-                    "to_ast": to_ast,
-                    "path": str(hint_file)
-                })
+                yield (algorithm_dir.name, assignment_dir.name,
+                       str(hint_file), hint_file.stem, hint_json)
+
+
+def load_generated_hints(algorithms_dir: str,
+                         backend: str = "csv") -> pd.DataFrame:
+    records = []
+
+    for algorithm, assignmentID, hint_file, stem, hint_json in iter_hint_files(
+        algorithms_dir, backend
+    ):
+        try:
+            to_ast = extract_target_ast(hint_json)
+        except KeyError as e:
+            print(f"Skipping {hint_file}: {e}")
+            continue
+
+        if "_" in stem:
+            requestID, hint_index = stem.split("_", 1)
+            hint_index = int(hint_index)
+        else:
+            requestID = stem
+            hint_index = None
+
+        records.append({
+            "source": "generated",
+            "algorithm": algorithm,
+            "assignmentID": assignmentID,
+            "requestID": str(requestID),
+            "hint_index": hint_index,
+            "from_ast": None,        # filled later
+            "to_ast": to_ast,
+            "path": hint_file
+        })
 
     return pd.DataFrame(records)
 
@@ -0,0 +1,228 @@
+"""Learning curves for training-data quantity experiments.
+
+Measures how hint availability and training-set aggregates change as more
+training traces are used. For each seed, the traces of every assignment are
+shuffled and added one round at a time (the k-th trace of each assignment
+in round k). Every derived structure is updated incrementally as traces are
+added: the interaction network from ``hint_graph.py``, its distances to
+correct states, and running per-assignment sums of the category features
+of traces that end in a correct state. At each requested subset size the
+current state is measured instead of rebuilding from scratch. Seeds run in
+parallel processes, which receive the parsed traces once on start-up.
+
+Usage (from a dataset directory such as ``isnap-s16``)::
+
+    python ../learning_curve.py --seeds 20 --sizes 1,2,5,10,20 \\
+        --grammar python-grammar.json --output learning_curve.csv
+"""
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ast_scan import ast_features, load_type_to_category
+from hint_graph import HintGraph, final_snapshots, iter_traces, trace_states
+from schema import read_table
+
+
+def prepare_traces(training: pd.DataFrame, type_to_category: dict) -> list:
+    """Parse and key every training trace once, for reuse across seeds.
+
+    Returns:
+        list: ``(assignmentID, states, final_features)`` per trace, where
+        ``states`` is the output of :func:`hint_graph.trace_states` and
+        ``final_features`` counts the final state's nodes, or is ``None``
+        if the trace does not end in a correct state.
+    """
+    traces = []
+    for (assignment, _), rows in iter_traces(training):
+        states = trace_states(rows)
+        _, _, final_ast, is_correct = states[-1]
+        features = (
+            ast_features(final_ast, type_to_category) if is_correct else None
+        )
+        traces.append((assignment, states, features))
+    return traces
+
+
+def prepare_requests(requests: pd.DataFrame) -> list:
+    """Key the final snapshot of every request trace.
+
+    Returns:
+        list: ``(assignmentID, node, structure)`` per hint request.
+    """
+    keyed = []
+    for (assignment, _), rows in iter_traces(final_snapshots(requests)):
+        node, structure, _, _ = trace_states(rows)[0]
+        keyed.append((assignment, node, structure))
+    return keyed
+
+
+def run_seed(seed: int, traces: list, requests: list, sizes: list) -> list:
+    """Grow the training set trace by trace and measure it at each size.
+
+    Args:
+        seed: Seed for the order in which traces are added.
+        traces: Output of :func:`prepare_traces`.
+        requests: Output of :func:`prepare_requests`.
+        sizes: Numbers of traces per assignment at which to measure.
+
+    Returns:
+        list: Tidy ``(seed, n_traces, assignmentID, metric, value)`` rows.
+    """
+    rng = np.random.default_rng(seed)
+
+    by_assignment = defaultdict(list)
+    for i, (assignment, _, _) in enumerate(traces):
+        by_assignment[assignment].append(i)
+    orders = {
+        assignment: rng.permutation(indices)
+        for assignment, indices in sorted(by_assignment.items())
+    }
+
+    requests_by_assignment = defaultdict(list)
+    for assignment, node, structure in requests:
+        requests_by_assignment[assignment].append((node, structure))
+
+    graph = HintGraph()
+    n_traces = Counter()
+    n_correct = Counter()
+    n_states = Counter()
+    feature_sums = defaultdict(Counter)
+    rows = []
+
+    for size in range(1, max(sizes) + 1):
+        for assignment, order in orders.items():
+            if size > len(order):
+                continue
+
+            _, states, features = traces[order[size - 1]]
+            n_states[assignment] += len(
+                {state[0] for state in states} - graph.asts.keys()
+            )
+            graph.add_trace(states)
+            n_traces[assignment] += 1
+            if features is not None:
+                n_correct[assignment] += 1
+                feature_sums[assignment].update(features)
+
+        if size not in sizes:
+            continue
+
+        graph.refresh()
+        for assignment in orders:
+            assignment_requests = requests_by_assignment[assignment]
+            covered = sum(
+                bool(graph.lookup(node, structure))
+                for node, structure in assignment_requests
+            )
+
+            metrics = {
+                "n_traces": n_traces[assignment],
+                "n_correct": n_correct[assignment],
+                "n_states": n_states[assignment],
+                "hint_coverage": (
+                    covered / len(assignment_requests)
+                    if assignment_requests else np.nan
+                ),
+            }
+            # Averaged over the final states of correct traces only
+            for feature, total in feature_sums[assignment].items():
+                metrics["mean_final_" + feature] = total / n_correct[assignment]
+
+            rows.extend(
+                (seed, size, assignment, metric, value)
+                for metric, value in metrics.items()
+            )
+
+    return rows
+
+
+# Inputs shared by every seed, set once per worker process by _init_worker
+# rather than pickled along with each task
+_shared = {}
+
+
+def _init_worker(traces: list, requests: list, sizes: list):
+    _shared.update(traces=traces, requests=requests, sizes=sizes)
+
+
+def _run_shared_seed(seed: int) -> list:
+    return run_seed(seed, **_shared)
+
+
+def learning_curve(training: pd.DataFrame, requests: pd.DataFrame,
+                   sizes: list, seeds: list, type_to_category: dict = None,
+                   jobs: int = None) -> pd.DataFrame:
+    """Run every seed in parallel and collect one tidy results table.
+
+    Args:
+        training: Training snapshots (``training.csv``).
+        requests: Request snapshots (``requests.csv``).
+        sizes: Numbers of traces per assignment at which to measure.
+        seeds: Random seeds, one learning curve each.
+        type_to_category: Grammar category of each node type, if any.
+        jobs: Number of worker processes (defaults to the CPU count).
+
+    Returns:
+        pd.DataFrame: Columns ``seed``, ``size``, ``assignmentID``,
+        ``metric`` and ``value``.
+    """
+    traces = prepare_traces(training, type_to_category or {})
+    keyed_requests = prepare_requests(requests)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(traces, keyed_requests, sorted(set(sizes))),
+    ) as executor:
+        results = list(executor.map(_run_shared_seed, seeds))
+
+    return pd.DataFrame(
+        [row for rows in results for row in rows],
+        columns=["seed", "size", "assignmentID", "metric", "value"],
+    )
+
+
+def main():
+    """Compute learning curves and write them as a tidy CSV."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--training", default="training.csv")
+    parser.add_argument("--requests", default="requests.csv")
+    parser.add_argument("--grammar", default=None)
+    parser.add_argument("--sizes", default="1,2,5,10,20,50,100",
+                        help="comma-separated traces per assignment")
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--jobs", type=int, default=None)
+    parser.add_argument("--output", default="learning_curve.csv")
+    args = parser.parse_args()
+
+    training = read_table("traces", args.training)
+    requests = read_table("traces", args.requests)
+    type_to_category = (
+        load_type_to_category(args.grammar) if args.grammar else None
+    )
+
+    # Sizes beyond the largest assignment would only repeat the last one
+    largest = training.groupby("assignmentID", observed=True)["traceID"].nunique()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    sizes = sorted({min(s, largest.max()) for s in sizes})
+
+    results = learning_curve(
+        training, requests, sizes, range(args.seeds), type_to_category,
+        args.jobs,
+    )
+    results.to_csv(args.output, index=False)
+
+    print(
+        results
+        .groupby(["size", "metric"])["value"]
+        .mean()
+        .unstack("metric")
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import corpus  # noqa: E402
+from schema import read_table  # noqa: E402
+
 
 def normalise_assignment_id(value: str):
     if pd.isna(value):
@@ -15,26 +23,30 @@ def normalise_assignment_id(value: str):
     return value
 
 
-def load_files() -> dict[str, pd.DataFrame]:
+def load_files(backend: str = "csv") -> dict[str, pd.DataFrame]:
+    # "sqlite" reads the rows ingested by `corpus.py ingest` instead
+    read = corpus.read_table if backend == "sqlite" else read_table
     data = {}
 
     # Main table containing student actions
-    data["main"] = pd.read_csv("MainTable.csv", low_memory=False)
+    data["main"] = read("main", "MainTable.csv")
 
     # Objectives for homeworks
-    data["guess2HW"] = pd.read_csv("grades/guess2HW.csv")
-    data["squiralHW"] = pd.read_csv("grades/squiralHW.csv")
+    data["guess2HW"] = read("grades", "grades/guess2HW.csv")
+    data["squiralHW"] = read("grades", "grades/squiralHW.csv")
 
     # Objectives for labs
-    data["guess1Lab"] = pd.read_csv("grades/guess1Lab.csv")
-    data["guess3Lab"] = pd.read_csv("grades/guess3Lab.csv")
-    data["polygonMakerLab"] = pd.read_csv("grades/polygonMakerLab.csv")
+    data["guess1Lab"] = read("grades", "grades/guess1Lab.csv")
+    data["guess3Lab"] = read("grades", "grades/guess3Lab.csv")
+    data["polygonMakerLab"] = read("grades", "grades/polygonMakerLab.csv")
 
     # Grades for associated labs or homeworks
-    data["student_assignment"] = pd.read_csv("LinkTables/AssignmentSubject.csv")
+    data["student_assignment"] = read(
+        "assignment_subject", "LinkTables/AssignmentSubject.csv"
+    )
 
-    # Code states
-    data["code_states"] = pd.read_csv("CodeStates/CodeStates.csv")
+    # Code states (not ingested into the corpus store)
+    data["code_states"] = read_table("code_states", "CodeStates/CodeStates.csv")
 
     # Normalise SubjectID from student_assignment dataframe
     data["student_assignment"]["SubjectID"] = (data["student_assignment"]["SubjectID"].apply(normalise_assignment_id))
@@ -43,6 +55,30 @@ def load_files() -> dict[str, pd.DataFrame]:
 
 
 
+def student_hint_usage(main_df: pd.DataFrame) -> pd.DataFrame:
+    # Flag hint events
+    main_df = main_df.assign(is_hint_event=main_df["X-HintData"].notna())
+
+    return (main_df.groupby("SubjectID", observed=True)
+            .agg(used_hint=("is_hint_event", "any"))
+            .reset_index())
+
+
+def combine_hint_usage(students: pd.DataFrame) -> pd.DataFrame:
+    # A student may appear in several partial tables (e.g. shards)
+    student_hint_usage = (students.groupby("SubjectID", observed=True)
+                          .agg(used_hint=("used_hint", "any"))
+                          .reset_index())
+
+    return (student_hint_usage.groupby("used_hint")
+            .size()
+            .reset_index(name="n_students"))
+
+
+def hint_usage(main_df: pd.DataFrame) -> pd.DataFrame:
+    return combine_hint_usage(student_hint_usage(main_df))
+
+
 def main():
     # Load related CSV files into data frame
     data = load_files()
@@ -52,16 +88,7 @@ def main():
 
     print(main_df.info())
 
-    # Flag hint events
-    main_df["is_hint_event"] = main_df["X-HintData"].notna()
-
-    student_hint_usage = (main_df.groupby("SubjectID")
-                          .agg(used_hint=("is_hint_event", "any"))
-                          .reset_index())
-    
-    summary = (student_hint_usage.groupby("used_hint")
-               .size()
-               .reset_index(name="n_students"))
+    summary = hint_usage(main_df)
 
     print(summary)
 
@@ -0,0 +1,292 @@
+"""Sessionization and time-on-task for ProgSnap2 MainTable events.
+
+Events are sorted once by (SubjectID, AssignmentID, timestamp), after which
+session boundaries, per-event gaps, positions within a session and hint
+latencies are all computed with whole-column array operations.
+
+For exports that do not fit in memory, ``sessionize_chunks`` streams the
+MainTable in fixed-size chunks and carries each (SubjectID, AssignmentID)
+pair's open session across chunk boundaries. This relies on the MainTable
+being in chronological order, as declared by ``IsEventOrderingConsistent``
+in DatasetMetadata.csv.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Shared modules (e.g. schema.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from schema import read_table  # noqa: E402
+
+KEYS = ["SubjectID", "AssignmentID"]
+TIMESTAMP = "ServerTimestamp"
+
+# Seconds of inactivity after which a new session starts
+DEFAULT_IDLE_GAP = 30 * 60
+
+CARRY_COLUMNS = ["time", "session", "session_start", "position"]
+
+
+def _prepare(events: pd.DataFrame) -> pd.DataFrame:
+    """Parse timestamps to epoch seconds, flag hints and sort events."""
+    timestamps = pd.to_datetime(events[TIMESTAMP], utc=True, format="ISO8601")
+
+    events = pd.DataFrame({
+        "SubjectID": events["SubjectID"].astype(str),
+        "AssignmentID": events["AssignmentID"].astype(str),
+        "Order": events["Order"],
+        "time": ((timestamps - pd.Timestamp(0, tz="UTC"))
+                 / pd.Timedelta(seconds=1)).to_numpy(),
+        "is_hint": events["X-HintData"].notna().to_numpy(),
+    })[timestamps.notna().to_numpy()]
+
+    return events.sort_values(KEYS + ["time", "Order"], kind="stable")
+
+
+def annotate_events(events: pd.DataFrame, idle_gap: float = DEFAULT_IDLE_GAP,
+                    carry: pd.DataFrame = None) -> pd.DataFrame:
+    """Assign sessions to MainTable events.
+
+    Args:
+        events: MainTable rows with ``SubjectID``, ``AssignmentID``,
+            ``Order``, ``ServerTimestamp`` and ``X-HintData`` columns.
+        idle_gap: Seconds of inactivity that end a session.
+        carry: Last annotated event per (SubjectID, AssignmentID) from a
+            previous chunk, indexed by ``KEYS``. ``None`` when the events
+            are processed in one piece.
+
+    Returns:
+        pd.DataFrame: Sorted events with ``time`` (epoch seconds), ``gap``
+        (seconds since the previous event of the same student and
+        assignment), ``session``, ``session_start``, ``position`` (index
+        within the session), ``elapsed`` (seconds since session start) and
+        ``is_hint`` columns.
+    """
+    events = _prepare(events)
+    n = len(events)
+    if n == 0:
+        # e.g. a chunk whose timestamps are all missing
+        return events.assign(
+            gap=np.empty(0),
+            session=np.empty(0, dtype="int64"),
+            session_start=np.empty(0),
+            position=np.empty(0, dtype="int64"),
+            elapsed=np.empty(0),
+        ).reset_index(drop=True)
+    rows = np.arange(n)
+
+    time = events["time"].to_numpy()
+    group = events.groupby(KEYS, sort=False).ngroup().to_numpy()
+
+    key_start = np.ones(n, dtype=bool)
+    key_start[1:] = group[1:] != group[:-1]
+    key_start_row = np.maximum.accumulate(np.where(key_start, rows, 0))
+
+    gap = np.empty(n)
+    gap[0] = np.nan
+    gap[1:] = np.diff(time)
+    gap[key_start] = np.nan
+
+    # Values carried over from the previous chunk, broadcast to every row
+    # of the same key; keys without history get NaN / -1.
+    if carry is not None and len(carry):
+        first = events[key_start]
+        previous = carry.reindex(pd.MultiIndex.from_frame(first[KEYS]))
+        gap[key_start] = time[key_start] - previous["time"].to_numpy()
+        carried = previous[CARRY_COLUMNS].to_numpy()[
+            np.cumsum(key_start) - 1
+        ]
+    else:
+        carried = np.full((n, len(CARRY_COLUMNS)), np.nan)
+
+    carried_session = np.nan_to_num(carried[:, 1], nan=-1)
+    new_session = np.isnan(gap) | (gap > idle_gap)
+
+    # Sessions are numbered from 0 within each (SubjectID, AssignmentID)
+    count = np.cumsum(new_session)
+    count_before_key = (count - new_session)[key_start_row]
+    session = carried_session + (count - count_before_key)
+
+    # Rows before the first new session of a key continue a carried session
+    last_new = np.maximum.accumulate(np.where(new_session, rows, -1))
+    continues = last_new < key_start_row
+
+    session_start = np.where(continues, carried[:, 2], time[last_new])
+    position = np.where(
+        continues,
+        carried[:, 3] + 1 + (rows - key_start_row),
+        rows - last_new,
+    )
+
+    return events.assign(
+        gap=gap,
+        session=session.astype("int64"),
+        session_start=session_start,
+        position=position.astype("int64"),
+        elapsed=time - session_start,
+    ).reset_index(drop=True)
+
+
+def session_summary(annotated: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate annotated events (or partial summaries) into sessions.
+
+    Partial summaries from several chunks can be passed in concatenated,
+    since every aggregate is mergeable (min, max or sum).
+
+    Args:
+        annotated: Output of :func:`annotate_events`, or concatenated
+            outputs of this function.
+
+    Returns:
+        pd.DataFrame: One row per session with start, end, duration (in
+        seconds), number of events and number of hint events.
+    """
+    if "n_events" not in annotated:
+        annotated = annotated.assign(
+            start=annotated["time"],
+            end=annotated["time"],
+            n_events=1,
+            n_hints=annotated["is_hint"],
+        )
+
+    sessions = (
+        annotated
+        .groupby(KEYS + ["session"], sort=False)
+        .agg(
+            start=("start", "min"),
+            end=("end", "max"),
+            n_events=("n_events", "sum"),
+            n_hints=("n_hints", "sum"),
+        )
+        .reset_index()
+    )
+    sessions["duration"] = sessions["end"] - sessions["start"]
+    return sessions
+
+
+def time_on_task(sessions: pd.DataFrame) -> pd.DataFrame:
+    """Total active time per student and assignment.
+
+    Args:
+        sessions: Output of :func:`session_summary`.
+
+    Returns:
+        pd.DataFrame: One row per (SubjectID, AssignmentID) with the number
+        of sessions, total time on task (seconds) and hint count.
+    """
+    return (
+        sessions
+        .groupby(KEYS)
+        .agg(
+            n_sessions=("session", "count"),
+            time_on_task=("duration", "sum"),
+            n_hints=("n_hints", "sum"),
+        )
+        .reset_index()
+    )
+
+
+def hint_latency(annotated: pd.DataFrame) -> pd.DataFrame:
+    """Timing of each hint event relative to its session and prior hints.
+
+    Args:
+        annotated: Output of :func:`annotate_events`.
+
+    Returns:
+        pd.DataFrame: One row per hint event with its session, position,
+        seconds since session start (``elapsed``) and seconds since the
+        previous hint of the same student and assignment.
+    """
+    hints = annotated.loc[
+        annotated["is_hint"],
+        KEYS + ["session", "position", "time", "gap", "elapsed"],
+    ]
+    previous = hints.groupby(KEYS, sort=False)["time"].shift()
+    return hints.assign(since_previous_hint=hints["time"] - previous)
+
+
+def sessionize(main_df: pd.DataFrame,
+               idle_gap: float = DEFAULT_IDLE_GAP) -> tuple:
+    """Sessionize a MainTable held in memory.
+
+    Returns:
+        tuple: ``(sessions, hints)`` as produced by :func:`session_summary`
+        and :func:`hint_latency`.
+    """
+    annotated = annotate_events(main_df, idle_gap)
+    return session_summary(annotated), hint_latency(annotated)
+
+
+def sessionize_chunks(path: str, idle_gap: float = DEFAULT_IDLE_GAP,
+                      chunksize: int = 1_000_000) -> tuple:
+    """Sessionize a MainTable too large for memory, one chunk at a time.
+
+    Only per-session partial aggregates, hint events and the last event of
+    each (SubjectID, AssignmentID) are kept between chunks.
+
+    Returns:
+        tuple: ``(sessions, hints)``, identical to :func:`sessionize` on
+        the whole file.
+    """
+    carry = None
+    partial_sessions = []
+    hints = []
+    previous_hint = None
+
+    for chunk in read_table("main", path, chunksize=chunksize):
+        annotated = annotate_events(chunk, idle_gap, carry)
+        partial_sessions.append(session_summary(annotated))
+
+        chunk_hints = hint_latency(annotated)
+        if previous_hint is not None:
+            first = ~chunk_hints.duplicated(KEYS)
+            before = previous_hint.reindex(
+                pd.MultiIndex.from_frame(chunk_hints.loc[first, KEYS])
+            ).to_numpy()
+            chunk_hints.loc[first, "since_previous_hint"] = (
+                chunk_hints.loc[first, "time"].to_numpy() - before
+            )
+        hints.append(chunk_hints)
+
+        last = annotated.groupby(KEYS, sort=False).tail(1).set_index(KEYS)
+        last_hint = chunk_hints.groupby(KEYS, sort=False)["time"].last()
+        if carry is None:
+            carry, previous_hint = last[CARRY_COLUMNS], last_hint
+        else:
+            carry = last[CARRY_COLUMNS].combine_first(carry)
+            previous_hint = last_hint.combine_first(previous_hint)
+
+    sessions = session_summary(pd.concat(partial_sessions, ignore_index=True))
+    return sessions, pd.concat(hints, ignore_index=True)
+
+
+def main():
+    """Print session, time-on-task and hint-latency summaries."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--main-table", default="MainTable.csv")
+    parser.add_argument("--idle-gap", type=float, default=DEFAULT_IDLE_GAP,
+                        help="seconds of inactivity that end a session")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the MainTable in chunks of this size")
+    args = parser.parse_args()
+
+    if args.chunksize:
+        sessions, hints = sessionize_chunks(
+            args.main_table, args.idle_gap, args.chunksize
+        )
+    else:
+        sessions, hints = sessionize(
+            read_table("main", args.main_table), args.idle_gap
+        )
+
+    print(sessions.describe())
+    print(time_on_task(sessions).groupby("AssignmentID")["time_on_task"]
+          .describe())
+    print(hints[["elapsed", "since_previous_hint"]].describe())
+
+
+if __name__ == "__main__":
+    main()
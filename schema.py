@@ -0,0 +1,264 @@
+"""Schema registry for the dataset CSV files.
+
+Every loader in this repository reads its CSVs through :func:`read_table`,
+which applies a declared column projection and narrow dtypes (categorical
+IDs, small integers, parsed booleans) instead of pandas' default inference.
+When ``pyarrow`` is installed, files larger than ``PYARROW_MIN_BYTES`` are
+parsed with its multithreaded CSV engine; otherwise, and for small files
+where thread start-up dominates, pandas' C engine is used.
+
+Run ``python schema.py`` from the repository root to compare load time and
+memory against plain ``pd.read_csv`` for every file that is present.
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    ENGINE = "pyarrow"
+except ImportError:
+    pa_csv = None
+    ENGINE = "c"
+
+PYARROW_MIN_BYTES = 256 * 1024
+
+
+SCHEMAS = {
+    # isnap-s16 / isnap-f16-f17: training.csv and requests.csv
+    "traces": {
+        "dtypes": {
+            "assignmentID": "category",
+            "traceID": "category",
+            "index": "int32",
+            "isCorrect": "bool",
+            "source": "string",
+            "code": "string",
+        },
+        "usecols": ["assignmentID", "traceID", "index", "isCorrect", "code"],
+    },
+    "gold": {
+        "dtypes": {
+            "assignmentID": "category",
+            "requestID": "category",
+            "year": "category",
+            "hintID": "int32",
+            "OneTutor": "bool",
+            "MultipleTutors": "bool",
+            "Consensus": "bool",
+            "priority": "Int8",
+            "from": "string",
+            "to": "string",
+        },
+    },
+    # isnap-f16
+    "ratings": {
+        "dtypes": {
+            "Assignment ID": "category",
+            "Attempt ID": "string",
+            "Hint ID": "int32",
+            "Hint Number": "int8",
+            "Timing": "category",
+            "Relevance": "int8",
+            "Correctness": "int8",
+            "Interpretability": "int8",
+            "Quality": "int8",
+            "Time": "float64",
+            "Followed": "bool",
+            "View Duration": "Int16",
+            "Pause Before Edit": "Int32",
+            "Hint Use Label": "int8",
+            "Total Hints Requested": "int16",
+            "Total Hints Followed": "int16",
+        },
+    },
+    # prog-snap-2
+    "main": {
+        "dtypes": {
+            "EventID": "string",
+            "Order": "int64",
+            "ProjectID": "string",
+            "SubjectID": "category",
+            "AssignmentID": "category",
+            "EventType": "category",
+            "CodeStateID": "string",
+            "ServerTimestamp": "string",
+            "X-HintData": "string",
+        },
+        "usecols": [
+            "EventID", "Order", "SubjectID", "AssignmentID", "ProjectID",
+            "EventType", "CodeStateID", "ServerTimestamp", "X-HintData",
+        ],
+    },
+    "code_states": {
+        "dtypes": {
+            "CodeStateID": "string",
+            "Code": "string",
+        },
+    },
+    "grades": {
+        "dtypes": {
+            "Project ID": "string",
+            "Graded ID": "Int32",
+        },
+        # Remaining columns are per-objective scores from 0 to 2
+        "default": "Int8",
+    },
+    "assignment_subject": {
+        "dtypes": {
+            "AssignmentID": "category",
+            "SubjectID": "string",
+            "ResearcherGrade0": "category",
+        },
+        "default": "float32",
+    },
+}
+
+
+def project(name: str, available, columns: list = None) -> list:
+    """Resolve which of the available columns a load should keep.
+
+    Args:
+        name: Key of the schema in ``SCHEMAS``.
+        available: Columns present in the source.
+        columns: Explicitly requested columns, if any.
+
+    Returns:
+        list: Requested (or projected) columns that are available.
+    """
+    wanted = columns or SCHEMAS[name].get("usecols") or list(available)
+    return [col for col in wanted if col in available]
+
+
+def column_dtypes(name: str, columns) -> dict:
+    """Map each column to its declared dtype under a schema.
+
+    Args:
+        name: Key of the schema in ``SCHEMAS``.
+        columns: Columns being loaded.
+
+    Returns:
+        dict: Column name to dtype, omitting undeclared columns.
+    """
+    schema = SCHEMAS[name]
+    dtypes = {}
+    for col in columns:
+        dtype = schema["dtypes"].get(col, schema.get("default"))
+        if dtype is not None:
+            dtypes[col] = dtype
+    return dtypes
+
+
+def read_table(name: str, path, columns: list = None,
+               chunksize: int = None) -> pd.DataFrame:
+    """Load a dataset CSV using its registered schema.
+
+    Args:
+        name: Key of the schema in ``SCHEMAS`` (e.g. ``"traces"``).
+        path: Path to the CSV file.
+        columns: Columns to load. Defaults to the schema's projection, or
+            every column in the file if the schema declares none. Columns
+            absent from the file are skipped.
+        chunksize: If given, return an iterator of dataframes with this
+            many rows each instead of loading the whole file.
+
+    Returns:
+        pd.DataFrame: The loaded table with declared dtypes applied.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = project(name, header, columns)
+    dtypes = column_dtypes(name, usecols)
+
+    if chunksize is not None:
+        return pd.read_csv(
+            path, usecols=usecols, dtype=dtypes, chunksize=chunksize
+        )
+
+    use_pyarrow = (
+        pa_csv is not None
+        and Path(path).stat().st_size >= PYARROW_MIN_BYTES
+    )
+    if use_pyarrow:
+        # Source code columns contain quoted newlines, which pandas'
+        # pyarrow engine cannot be told about, so the reader is configured
+        # directly. Text columns are read as text, so that numeric IDs give
+        # the same (string) categories as pandas' C engine.
+        text_types = {
+            col: pa.string() for col, dtype in dtypes.items()
+            if dtype in ("category", "string")
+        }
+        try:
+            table = pa_csv.read_csv(
+                path,
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=usecols, strings_can_be_null=True,
+                    column_types=text_types,
+                ),
+            )
+            return table.to_pandas().astype(dtypes)
+        except pa.ArrowInvalid:
+            # Ragged rows (e.g. AssignmentSubject.csv) need pandas' padding
+            pass
+
+    return pd.read_csv(path, usecols=usecols, dtype=dtypes)
+
+
+# File locations relative to the repository root, used by the benchmark
+DATASET_FILES = [
+    ("traces", "isnap-s16/training.csv"),
+    ("traces", "isnap-s16/requests.csv"),
+    ("gold", "isnap-s16/gold-standard.csv"),
+    ("traces", "isnap-f16-f17/training.csv"),
+    ("traces", "isnap-f16-f17/requests.csv"),
+    ("gold", "isnap-f16-f17/gold-standard.csv"),
+    ("ratings", "isnap-f16/ratings.csv"),
+    ("main", "prog-snap-2/MainTable.csv"),
+    ("code_states", "prog-snap-2/CodeStates/CodeStates.csv"),
+    ("assignment_subject", "prog-snap-2/LinkTables/AssignmentSubject.csv"),
+] + [
+    ("grades", f"prog-snap-2/grades/{assignment}.csv")
+    for assignment in (
+        "guess1Lab", "guess2HW", "guess3Lab", "polygonMakerLab", "squiralHW"
+    )
+]
+
+
+def _measure(load):
+    """Return (seconds, deep memory in bytes) for a dataframe loader."""
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    return elapsed, df.memory_usage(deep=True).sum()
+
+
+def main():
+    """Compare default and schema-based loading for each dataset file."""
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent
+    print(f"CSV engine: {ENGINE}")
+
+    for name, relative in DATASET_FILES:
+        path = root / relative
+        if not path.exists():
+            continue
+
+        try:
+            base_time, base_mem = _measure(
+                lambda: pd.read_csv(path, low_memory=False)
+            )
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            print(f"Skipping {relative}: {e}")
+            continue
+        new_time, new_mem = _measure(lambda: read_table(name, path))
+
+        print(
+            f"{relative}: {base_time * 1000:.1f}ms -> {new_time * 1000:.1f}ms, "
+            f"{base_mem / 1e6:.2f}MB -> {new_mem / 1e6:.2f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
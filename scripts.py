@@ -0,0 +1,67 @@
+"""Import and run the per-dataset scripts from the repository root.
+
+The dataset directories (``isnap-s16``, ``prog-snap-2``, ...) are not
+packages. Their scripts are run from their own directory (``cd isnap-s16
+&& python program.py``) and put the root on ``sys.path`` themselves, for
+shared modules such as ``schema.py``. From the root::
+
+    python scripts.py isnap-f16-f17/analysis.py [args...]
+
+does the same, and :func:`import_script` loads a script as a module (as
+``cli.py`` and ``shard.py`` do).
+"""
+import importlib.util
+import os
+import runpy
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+
+def import_script(path: str):
+    """Import a dataset script by path under a unique module name.
+
+    Both ``isnap-s16`` and ``prog-snap-2`` have a ``program.py``, and the
+    dataset directories are not packages, so scripts cannot be imported
+    by name.
+    """
+    path = ROOT / path
+    name = "_".join(path.relative_to(ROOT).with_suffix("").parts)
+    name = name.replace("-", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_script(path: str, argv: list = None):
+    """Run a dataset script as ``__main__`` from its own directory.
+
+    Args:
+        path: Script path, relative to the repository root.
+        argv: Command-line arguments for the script.
+    """
+    path = (ROOT / path).resolve()
+
+    # As `python script.py` would: the script's directory is importable
+    # and sys.argv holds its own arguments
+    sys.path.insert(0, str(path.parent))
+    sys.argv = [str(path)] + list(argv or [])
+    os.chdir(path.parent)
+    runpy.run_path(str(path), run_name="__main__")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in ("-h", "--help"):
+        print(__doc__)
+        sys.exit(0 if len(sys.argv) > 1 else 2)
+    run_script(sys.argv[1], sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
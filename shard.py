@@ -0,0 +1,375 @@
+"""Hash-sharded execution of the dataset analyses.
+
+Input rows are partitioned by a stable hash of their trace or student ID
+into N shard directories, each laid out like the dataset it came from
+(``training.csv``, ``requests.csv``, ``gold-standard.csv``,
+``MainTable.csv`` and the grammar file). Every shard is then processed
+independently, by local processes or by separate machines pointed at a
+shared directory, and writes a partial result next to its input. A reduce
+step stacks the partials and combines them.
+
+Partials are mergeable by construction:
+
+- ``features``, ``history`` and ``ambiguity`` produce one row per trace
+  or snapshot. Every row of a trace, and the gold hints of the request
+  it ends in (``requestID`` equals ``traceID``), hash to the same shard,
+  so the per-shard rows are final and the reduce only concatenates them.
+- ``evolution`` keeps per (assignment, progress bin) sums and snapshot
+  counts, which are added up before taking means.
+- ``hint-usage`` keeps whether each student used a hint, combined with
+  ``any`` in case a student appears in several partials.
+
+The single-node result is the combine step applied to the partial of the
+whole dataset, so both paths share one implementation. Rows are returned
+in a canonical order (sorted by every column), and categorical columns
+get the union of the shards' categories, so the two results are equal
+row for row; ``run --check`` asserts this.
+
+Usage (from the repository root)::
+
+    python shard.py partition isnap-f16-f17 shards --shards 8
+    python shard.py map evolution shards/shard-0003   # one per shard
+    python shard.py reduce evolution shards --output evolution.csv
+
+    # Or all three steps with local processes
+    python shard.py run evolution isnap-f16-f17 --shards 8 --check
+"""
+import argparse
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ast_scan import GRAMMAR_FILES, grammar_path, load_type_to_category
+from schema import project, read_table
+from scripts import import_script
+
+# Partitioned files: name, schema, column whose hash picks the shard
+SHARDED_FILES = [
+    ("training.csv", "traces", "traceID"),
+    ("requests.csv", "traces", "traceID"),
+    ("gold-standard.csv", "gold", "requestID"),
+    ("MainTable.csv", "main", "SubjectID"),
+]
+
+# Rows read at once while partitioning
+CHUNKSIZE = 100_000
+
+
+def shard_of(keys: pd.Series, n_shards: int) -> np.ndarray:
+    """Shard of each key, the same in every process and on every machine.
+
+    Keys are hashed as strings with pandas' fixed-key SipHash, so IDs read
+    as categories, strings or numbers land in the same shard.
+    """
+    hashes = pd.util.hash_array(keys.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def shard_dirs(shards_dir) -> list:
+    """Shard directories under ``shards_dir``, in shard order."""
+    return sorted(Path(shards_dir).glob("shard-*"))
+
+
+def partition(dataset, shards_dir, n_shards: int,
+              chunksize: int = CHUNKSIZE) -> dict:
+    """Split a dataset directory into ``n_shards`` shard directories.
+
+    Files are streamed in chunks, so the dataset never has to fit in
+    memory. Only the schema's projected columns are kept.
+
+    Returns:
+        dict: Number of rows written to each shard, per file.
+    """
+    dataset, shards_dir = Path(dataset), Path(shards_dir)
+    if shard_dirs(shards_dir):
+        raise FileExistsError(f"{shards_dir} already holds shards")
+
+    dirs = [shards_dir / f"shard-{i:04d}" for i in range(n_shards)]
+    for path in dirs:
+        path.mkdir(parents=True)
+
+    for name in GRAMMAR_FILES:
+        if (dataset / name).exists():
+            text = (dataset / name).read_text()
+            for path in dirs:
+                (path / name).write_text(text)
+
+    written = {}
+    for name, schema, key in SHARDED_FILES:
+        if not (dataset / name).exists():
+            continue
+
+        available = pd.read_csv(dataset / name, nrows=0).columns
+        columns = project(schema, available)
+        header = pd.DataFrame(columns=columns).to_csv(index=False)
+
+        counts = np.zeros(n_shards, dtype=np.int64)
+        files = [open(path / name, "w", newline="") for path in dirs]
+        try:
+            for f in files:
+                f.write(header)
+            for chunk in read_table(schema, dataset / name,
+                                    chunksize=chunksize):
+                shards = shard_of(chunk[key], n_shards)
+                for shard, rows in chunk.groupby(shards, sort=False):
+                    # Chunks keep the file's column order, not the header's
+                    rows[columns].to_csv(files[shard], header=False,
+                                         index=False)
+                    counts[shard] += len(rows)
+        finally:
+            for f in files:
+                f.close()
+        written[name] = counts
+
+    return written
+
+
+# --------------------------------------------------
+# Analyses: partial of one directory, combine of stacked partials
+# --------------------------------------------------
+
+def _sorted_rows(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rows in canonical order, so results do not depend on sharding."""
+    return frame.sort_values(list(frame.columns),
+                             kind="stable").reset_index(drop=True)
+
+
+def _features_partial(directory: Path):
+    request = import_script("isnap-f16-f17/request.py")
+    type_to_category = load_type_to_category(grammar_path(directory))
+    requests = read_table("traces", directory / "requests.csv")
+    return request.request_features(
+        request.request_states(requests), type_to_category
+    )
+
+
+def _history_partial(directory: Path):
+    request = import_script("isnap-f16-f17/request.py")
+    type_to_category = load_type_to_category(grammar_path(directory))
+    return request.request_history(
+        read_table("traces", directory / "requests.csv"), type_to_category
+    )
+
+
+def _ambiguity_partial(directory: Path):
+    analysis = import_script("isnap-f16-f17/analysis.py")
+    return analysis.request_ambiguity(
+        read_table("traces", directory / "training.csv"),
+        read_table("traces", directory / "requests.csv"),
+        analysis.SnapGrammar(grammar_path(directory)),
+        analysis.GoldStandard(directory / "gold-standard.csv"),
+    )
+
+
+def _evolution_partial(directory: Path):
+    training = import_script("isnap-f16-f17/training.py")
+    type_to_category = load_type_to_category(grammar_path(directory))
+    return training.evolution_partial(training.grammar_features(
+        read_table("traces", directory / "training.csv"), type_to_category
+    ))
+
+
+def _evolution_combine(partials: pd.DataFrame):
+    training = import_script("isnap-f16-f17/training.py")
+    return training.combine_evolution(partials)
+
+
+def _hint_usage_partial(directory: Path):
+    program = import_script("prog-snap-2/program.py")
+    return program.student_hint_usage(
+        read_table("main", directory / "MainTable.csv")
+    )
+
+
+def _hint_usage_combine(partials: pd.DataFrame):
+    program = import_script("prog-snap-2/program.py")
+    return program.combine_hint_usage(partials)
+
+
+# Name: (partial of a directory, combine of stacked partials)
+ANALYSES = {
+    "features": (_features_partial, _sorted_rows),
+    "history": (_history_partial, _sorted_rows),
+    "ambiguity": (_ambiguity_partial, _sorted_rows),
+    "evolution": (_evolution_partial, _evolution_combine),
+    "hint-usage": (_hint_usage_partial, _hint_usage_combine),
+}
+
+
+def stack(frames: list) -> pd.DataFrame:
+    """Concatenate partial frames, keeping categorical columns categorical.
+
+    Columns that are categorical in any partial get the sorted union of
+    their categories, as a single-node read of the whole file would.
+    Partials holding the same column as strings (e.g. after a shard-local
+    ``pd.concat`` of frames with different categories) are converted
+    first.
+    """
+    nonempty = [frame for frame in frames if len(frame)] or frames[:1]
+    stacked = pd.concat(nonempty, ignore_index=True)
+
+    for col in stacked.columns:
+        columns = [frame[col] for frame in nonempty]
+        is_categorical = [
+            isinstance(c.dtype, pd.CategoricalDtype) for c in columns
+        ]
+        if (isinstance(stacked[col].dtype, pd.CategoricalDtype)
+                or not any(is_categorical)):
+            continue
+        if not all(categorical or pd.api.types.is_string_dtype(c)
+                   for c, categorical in zip(columns, is_categorical)):
+            continue
+        stacked[col] = union_categoricals(
+            [c if categorical else c.astype("category")
+             for c, categorical in zip(columns, is_categorical)],
+            sort_categories=True,
+        )
+    return stacked
+
+
+def combine(analysis: str, partials: list):
+    """Combine the partials of an analysis into its result.
+
+    Partials may be frames or tuples of frames (combined element-wise).
+    """
+    combine_step = ANALYSES[analysis][1]
+    if isinstance(partials[0], tuple):
+        return tuple(combine_step(stack(list(parts)))
+                     for parts in zip(*partials))
+    return combine_step(stack(partials))
+
+
+def single_node(analysis: str, dataset):
+    """Result of an analysis over a whole dataset, without sharding."""
+    return combine(analysis, [ANALYSES[analysis][0](Path(dataset))])
+
+
+def partial_path(analysis: str, directory) -> Path:
+    return Path(directory) / f"{analysis}.partial.pkl"
+
+
+def map_shard(analysis: str, directory) -> Path:
+    """Compute one shard's partial and write it next to its input.
+
+    The file is written under a temporary name and renamed, so a reduce
+    running against a shared directory never reads a partial file.
+    """
+    partial = ANALYSES[analysis][0](Path(directory))
+
+    target = partial_path(analysis, directory)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        pickle.dump(partial, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, target)
+    return target
+
+
+def reduce_shards(analysis: str, shards_dir):
+    """Combine the partials of every shard under ``shards_dir``."""
+    paths = [partial_path(analysis, d) for d in shard_dirs(shards_dir)]
+    if not paths:
+        raise FileNotFoundError(f"No shard directories in {shards_dir}")
+    missing = [str(p.parent.name) for p in paths if not p.exists()]
+    if missing:
+        raise FileNotFoundError(
+            f"No {analysis} partial for {', '.join(missing)}"
+        )
+
+    partials = []
+    for path in paths:
+        with open(path, "rb") as f:
+            partials.append(pickle.load(f))
+    return combine(analysis, partials)
+
+
+def _assert_equal(result, expected):
+    if isinstance(expected, tuple):
+        for part, expected_part in zip(result, expected):
+            _assert_equal(part, expected_part)
+        return
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def _show(result, output=None):
+    parts = result if isinstance(result, tuple) else (result,)
+    if output:
+        # Tuples are written as <output stem>-<n><suffix>
+        output = Path(output)
+        for i, part in enumerate(parts):
+            path = output if len(parts) == 1 else output.with_name(
+                f"{output.stem}-{i}{output.suffix}"
+            )
+            part.to_csv(path, index=False)
+    for part in parts:
+        print(part)
+
+
+def main():
+    """Partition a dataset, process shards and reduce their partials."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sub = subparsers.add_parser("partition", help="split a dataset")
+    sub.add_argument("dataset", type=Path)
+    sub.add_argument("shards_dir", type=Path)
+    sub.add_argument("--shards", type=int, required=True)
+
+    sub = subparsers.add_parser("map", help="process one shard")
+    sub.add_argument("analysis", choices=ANALYSES)
+    sub.add_argument("shard", type=Path, help="one shard-NNNN directory")
+
+    sub = subparsers.add_parser("reduce", help="combine shard partials")
+    sub.add_argument("analysis", choices=ANALYSES)
+    sub.add_argument("shards_dir", type=Path)
+    sub.add_argument("--output", default=None)
+
+    sub = subparsers.add_parser(
+        "run", help="partition, map in local processes and reduce"
+    )
+    sub.add_argument("analysis", choices=ANALYSES)
+    sub.add_argument("dataset", type=Path)
+    sub.add_argument("--shards", type=int, default=os.cpu_count())
+    sub.add_argument("--shards-dir", type=Path, default=None,
+                     help="keep the shards here instead of a temp dir")
+    sub.add_argument("--workers", type=int, default=None)
+    sub.add_argument("--check", action="store_true",
+                     help="compare with the single-node result")
+    sub.add_argument("--output", default=None)
+
+    args = parser.parse_args()
+
+    if args.command == "partition":
+        written = partition(args.dataset, args.shards_dir, args.shards)
+        for name, counts in written.items():
+            print(f"{name}: {counts.sum()} rows, "
+                  f"{counts.min()}-{counts.max()} per shard")
+
+    elif args.command == "map":
+        print(map_shard(args.analysis, args.shard))
+
+    elif args.command == "reduce":
+        _show(reduce_shards(args.analysis, args.shards_dir), args.output)
+
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            shards_dir = args.shards_dir or Path(tmp)
+            partition(args.dataset, shards_dir, args.shards)
+            dirs = shard_dirs(shards_dir)
+            with ProcessPoolExecutor(args.workers) as pool:
+                list(pool.map(map_shard, [args.analysis] * len(dirs), dirs))
+            result = reduce_shards(args.analysis, shards_dir)
+
+        if args.check:
+            _assert_equal(result, single_node(args.analysis, args.dataset))
+            print(f"{args.analysis}: {args.shards} shards match the "
+                  "single-node result")
+        _show(result, args.output)
+
+
+if __name__ == "__main__":
+    main()
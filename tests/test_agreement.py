@@ -0,0 +1,102 @@
+"""``agreement.agreement`` must match a brute-force set comparison."""
+import json
+from collections import defaultdict
+
+import pandas as pd
+
+from agreement import agreement, hint_keys
+
+# (algorithm, assignmentID, requestID, key), in input order
+KEYS = pd.DataFrame([
+    ("CTD", "a", "r1", "x"),
+    ("CTD", "a", "r1", "y"),
+    ("CTD", "a", "r1", "x"),
+    ("PQGram", "a", "r1", "x"),
+    ("PQGram", "a", "r1", "z"),
+    ("gold", "a", "r1", "y"),
+    ("gold", "a", "r1", "x"),
+    ("CTD", "a", "r2", "x"),
+    ("PQGram", "a", "r2", "w"),
+    ("PQGram", "a", "r2", "w"),
+    ("CTD", "b", "r1", "x"),
+    ("gold", "b", "r1", "v"),
+    ("ITAP", "b", "r3", "u"),
+], columns=["algorithm", "assignmentID", "requestID", "key"])
+
+
+def brute_force_pairs(keys: pd.DataFrame) -> pd.DataFrame:
+    hints = defaultdict(set)
+    for row in keys.itertuples(index=False):
+        hints[row.assignmentID, row.requestID, row.algorithm].add(row.key)
+
+    rows = []
+    requests = sorted({(a, r) for a, r, _ in hints})
+    algorithms = sorted(keys["algorithm"].unique())
+    for assignment, request in requests:
+        for a in algorithms:
+            for b in algorithms:
+                hints_a = hints.get((assignment, request, a), set())
+                hints_b = hints.get((assignment, request, b), set())
+                if not hints_a or not hints_b:
+                    continue
+                rows.append({
+                    "assignmentID": assignment,
+                    "requestID": request,
+                    "a": a,
+                    "b": b,
+                    "n_a": len(hints_a),
+                    "n_b": len(hints_b),
+                    "shared": len(hints_a & hints_b),
+                    "jaccard": len(hints_a & hints_b) / len(hints_a | hints_b),
+                })
+    return pd.DataFrame(rows)
+
+
+def brute_force_duplicates(keys: pd.DataFrame) -> pd.DataFrame:
+    seen, seen_by = set(), set()
+    counts = defaultdict(lambda: {"n_files": 0, "within": 0, "across": 0})
+    for row in keys.itertuples(index=False):
+        hint = (row.assignmentID, row.requestID, row.key)
+        count = counts[row.algorithm]
+        count["n_files"] += 1
+        count["within"] += (row.algorithm, hint) in seen_by
+        count["across"] += hint in seen
+        seen.add(hint)
+        seen_by.add((row.algorithm, hint))
+
+    return pd.DataFrame([
+        {"algorithm": algorithm, **count}
+        for algorithm, count in sorted(counts.items())
+    ])
+
+
+def test_pairs_match_brute_force():
+    pairs, _ = agreement(KEYS)
+    order = ["assignmentID", "requestID", "a", "b"]
+    pd.testing.assert_frame_equal(
+        pairs.sort_values(order).reset_index(drop=True),
+        brute_force_pairs(KEYS).sort_values(order).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_duplicates_match_brute_force():
+    _, duplicates = agreement(KEYS)
+    pd.testing.assert_frame_equal(duplicates, brute_force_duplicates(KEYS),
+                                  check_dtype=False)
+
+
+def test_keys_ignore_child_key_names():
+    by_name = {"type": "Return", "childrenOrder": ["value"],
+               "children": {"value": {"type": "Name", "value": "s"}}}
+    by_index = {"type": "Return", "childrenOrder": ["0"],
+                "children": {"0": {"type": "Name", "value": "s", "id": 3}}}
+    hints = pd.DataFrame({
+        "algorithm": ["ITAP", "CTD"],
+        "assignmentID": "a",
+        "requestID": "r1",
+        "json": [json.dumps(by_name), json.dumps(by_index)],
+    })
+
+    keys = hint_keys(hints)["key"]
+    assert keys[0] == keys[1]
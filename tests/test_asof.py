@@ -0,0 +1,63 @@
+"""``asof.asof_indices`` must match ``pandas.merge_asof``."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from asof import asof_indices
+
+N_EVENTS = 200_000
+N_QUERIES = 50_000
+
+
+def synthetic(n: int, rng) -> pd.DataFrame:
+    """Rows with a two-column key, integral times (so ties are common)
+    and about 1% missing times."""
+    times = rng.integers(0, 20_000, n).astype(np.float64)
+    times[rng.random(n) < 0.01] = np.nan
+    return pd.DataFrame({
+        "subject": rng.integers(0, 300, n).astype(str),
+        "assignment": rng.choice(["a", "b", "c"], n),
+        "time": times,
+    })
+
+
+def reference(left, right, **kwargs) -> np.ndarray:
+    """Matched right position per left row, computed with merge_asof."""
+    matched = np.full(len(left), -1)
+
+    # merge_asof rejects missing times, which never match anyway
+    left = left.assign(left_row=np.arange(len(left))).dropna(subset=["time"])
+    right = right.assign(right_row=np.arange(len(right)))
+    right = right.dropna(subset=["time"])
+
+    merged = pd.merge_asof(
+        left.sort_values("time", kind="stable"),
+        right.sort_values("time", kind="stable"),
+        on="time", by=["subject", "assignment"], **kwargs,
+    )
+    matched[merged["left_row"]] = merged["right_row"].fillna(-1)
+    return matched
+
+
+@pytest.mark.parametrize("direction", ["backward", "forward"])
+@pytest.mark.parametrize("tolerance", [None, 25.0])
+@pytest.mark.parametrize("allow_exact_matches", [True, False])
+def test_matches_merge_asof(direction, tolerance, allow_exact_matches):
+    rng = np.random.default_rng(0)
+    left = synthetic(N_QUERIES, rng)
+    right = synthetic(N_EVENTS, rng)
+    keys = ["subject", "assignment"]
+
+    matched = asof_indices(
+        left[keys], left["time"].to_numpy(),
+        right[keys], right["time"].to_numpy(),
+        direction=direction, tolerance=tolerance,
+        allow_exact_matches=allow_exact_matches,
+    )
+
+    expected = reference(left, right, direction=direction,
+                         tolerance=tolerance,
+                         allow_exact_matches=allow_exact_matches)
+
+    assert (matched[left["time"].isna()] == -1).all()
+    np.testing.assert_array_equal(matched, expected)
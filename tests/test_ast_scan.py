@@ -0,0 +1,77 @@
+"""``ast_scan.category_counts`` must match walking the parsed trees."""
+import json
+
+import pandas as pd
+import pytest
+
+from ast_scan import (
+    CATEGORIES, MAX_TYPE_LENGTH, ROOT, _tree_walk, category_counts,
+    dataset_codes, load_type_to_category,
+)
+
+LONG = "Long" * (MAX_TYPE_LENGTH // 2)
+
+TYPE_TO_CATEGORY = {
+    "doIf": "COMMAND",
+    "reportSum": "REPORTER",
+    "receiveGo": "HAT",
+    "reportTrue": "BOOLEAN",
+    LONG: "REPORTER",
+}
+
+TREE = {
+    "type": "script",
+    "children": {
+        "0": {"type": "receiveGo", "children": {}},
+        "1": {"type": "doIf", "children": {
+            "type": {"type": "reportTrue"},
+            "value": {"type": "literal", "value": '"type": "doIf"'},
+            "2": {"type": "reportSum", "children": {"0": {"type": LONG}}},
+            "3": {"type": LONG + "X", "value": "type"},
+            "4": {"type": "", "value": "\\"},
+        }},
+    },
+}
+
+
+def assert_same_counts(codes: pd.Series, type_to_category: dict):
+    expected = _tree_walk(codes, type_to_category)
+    scanned = category_counts(codes, type_to_category, nodes=True)
+    pd.testing.assert_frame_equal(scanned, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("dataset", ["isnap-s16", "isnap-f16-f17"])
+def test_bundled_sources(dataset):
+    dataset = ROOT / dataset
+    type_to_category = load_type_to_category(
+        next(dataset.glob("*-grammar.json"))
+    )
+    sources = dataset_codes(dataset)
+    assert sources
+
+    for codes in sources.values():
+        assert_same_counts(codes.reset_index(drop=True), type_to_category)
+
+
+@pytest.mark.parametrize("layout", [
+    {},
+    {"indent": 4},
+    {"separators": (", ", " : ")},
+    {"separators": (",", ":\t\t")},
+    {"ensure_ascii": False},
+])
+def test_layouts_and_edge_cases(layout):
+    codes = pd.Series([
+        json.dumps(TREE, **layout),
+        json.dumps({"type": "doIf", "value": "é \\\"type\\\": ünï"}, **layout),
+        json.dumps({"type": "script"}, **layout),
+    ])
+    assert_same_counts(codes, TYPE_TO_CATEGORY)
+
+
+def test_unmapped_categories_are_zero():
+    codes = pd.Series([json.dumps(TREE)])
+    counts = category_counts(codes, {}, nodes=True)
+
+    assert (counts[["n_" + c for c in CATEGORIES]] == 0).all(axis=None)
+    assert counts["n_nodes"][0] == _tree_walk(codes, {})["n_nodes"][0]
@@ -0,0 +1,50 @@
+"""Resampling and interval checks for ``bootstrap.py``."""
+import numpy as np
+import pandas as pd
+
+from bootstrap import bootstrap, resample_counts
+
+
+def score_matrix(seed: int = 0) -> pd.DataFrame:
+    """90 requests over three unevenly sized assignments."""
+    rng = np.random.default_rng(seed)
+    assignments = np.repeat(["a", "b", "c"], [50, 30, 10])
+    index = pd.MultiIndex.from_arrays(
+        [assignments, [f"r{i}" for i in range(len(assignments))]],
+        names=["assignmentID", "requestID"],
+    )
+    return pd.DataFrame({
+        "CTD": rng.random(len(index)),
+        "PQGram": rng.random(len(index)),
+    }, index=index)
+
+
+def test_resamples_keep_stratum_sizes():
+    strata = np.array(["b", "a", "c", "a", "b", "a", "c", "a"])
+    counts = resample_counts(strata, 500, np.random.default_rng(1))
+
+    assert counts.shape == (500, len(strata))
+    for label in np.unique(strata):
+        in_stratum = strata == label
+        np.testing.assert_array_equal(counts[:, in_stratum].sum(axis=1),
+                                      in_stratum.sum())
+
+
+def test_same_seed_same_result():
+    matrix = score_matrix()
+    first = bootstrap(matrix, "assignmentID", 1000, seed=7)
+    second = bootstrap(matrix, "assignmentID", 1000, seed=7)
+
+    for a, b in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_identical_columns_do_not_differ():
+    matrix = score_matrix()
+    matrix["copy"] = matrix["CTD"]
+    _, pairs = bootstrap(matrix, "assignmentID", 1000)
+
+    same = pairs[(pairs["a"] == "CTD") & (pairs["b"] == "copy")].iloc[0]
+    assert same["mean_diff"] == 0
+    assert same["ci_low"] == same["ci_high"] == 0
+    assert same["p_value"] == 1
@@ -0,0 +1,57 @@
+"""The SQLite store must read back what the CSV and JSON files hold."""
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import corpus
+from schema import read_table
+
+ROOT = Path(__file__).resolve().parents[1]
+DATASET = ROOT / "isnap-s16"
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("corpus") / "corpus.sqlite"
+    corpus.ingest([DATASET], path)
+    return path
+
+
+@pytest.mark.parametrize("name, file", [
+    ("traces", "training.csv"),
+    ("traces", "requests.csv"),
+    ("gold", "gold-standard.csv"),
+])
+def test_read_table(db_path, name, file):
+    stored = corpus.read_table(name, DATASET / file, db_path=db_path)
+    pd.testing.assert_frame_equal(stored, read_table(name, DATASET / file))
+
+
+def test_read_hint_files(db_path):
+    stored = corpus.read_hint_files(DATASET / "algorithms", db_path=db_path)
+    paths = sorted((DATASET / "algorithms").glob("*/*/*.json"))
+
+    assert stored["path"].tolist() == [corpus.source_key(p) for p in paths]
+    assert stored["stem"].tolist() == [p.stem for p in paths]
+    assert stored["requestID"].tolist() == [
+        p.stem.split("_")[0] for p in paths
+    ]
+    assert [json.loads(text) for text in stored["json"]] == [
+        json.loads(p.read_text()) for p in paths
+    ]
+
+
+def test_missing_inputs_raise(db_path, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        corpus.read_table("traces", DATASET / "training.csv",
+                          db_path=tmp_path / "missing.sqlite")
+    assert not (tmp_path / "missing.sqlite").exists()
+
+    with pytest.raises(FileNotFoundError):
+        corpus.read_table("traces", tmp_path / "training.csv",
+                          db_path=db_path)
+    with pytest.raises(FileNotFoundError):
+        corpus.read_hint_files(tmp_path / "algorithms", db_path=db_path)
+
@@ -0,0 +1,41 @@
+"""``hint_graph.write_hints`` may only clean up its own output."""
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from hint_graph import MARKER, HintGraph, write_hints
+
+AST = {"type": "Module", "children": {}}
+
+
+def requests() -> pd.DataFrame:
+    return pd.DataFrame({
+        "assignmentID": ["a"],
+        "traceID": ["r1"],
+        "code": [json.dumps(AST)],
+    })
+
+
+def test_refuses_foreign_hints(tmp_path: Path):
+    foreign = tmp_path / "CTD" / "a" / "r1_00.json"
+    foreign.parent.mkdir(parents=True)
+    foreign.write_text("{}")
+
+    with pytest.raises(FileExistsError):
+        write_hints(HintGraph(), requests(), tmp_path / "CTD", 1)
+    assert foreign.exists()
+    assert not (tmp_path / "CTD" / MARKER).exists()
+
+
+def test_replaces_own_hints(tmp_path: Path):
+    output_dir = tmp_path / "InteractionNetwork"
+    write_hints(HintGraph(), requests(), output_dir, 1)
+    assert (output_dir / MARKER).exists()
+
+    stale = output_dir / "a" / "r1_02.json"
+    stale.parent.mkdir(parents=True, exist_ok=True)
+    stale.write_text("{}")
+    write_hints(HintGraph(), requests(), output_dir, 1)
+    assert not stale.exists()
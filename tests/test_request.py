@@ -0,0 +1,77 @@
+"""``request.request_history`` must match a per-trace loop."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ast_scan import (
+    CATEGORIES, ROOT, ast_features, grammar_path, load_type_to_category,
+)
+from schema import read_table
+from scripts import import_script
+
+DATASET = ROOT / "isnap-s16"
+KEYS = ["assignmentID", "traceID"]
+COUNTS = ["n_" + c for c in CATEGORIES] + ["n_nodes"]
+
+
+def reference_history(requests: pd.DataFrame, type_to_category: dict,
+                      k: int) -> pd.DataFrame:
+    """Walk each trace's snapshots in order, one at a time."""
+    rows = []
+    for (assignment, trace), snapshots in requests.groupby(
+            KEYS, observed=True, sort=False):
+        snapshots = snapshots.sort_values("index", kind="stable")
+        codes = snapshots["code"].tolist()
+        index = snapshots["index"].tolist()
+        values = []
+        for code in codes:
+            features = ast_features(json.loads(code), type_to_category)
+            values.append(np.array([features[c] for c in COUNTS]))
+
+        last = len(codes) - 1
+        earlier = max(last - k, 0)
+        n_edits = n_recent_edits = 0
+        last_change = last_growth = 0
+        for i in range(1, len(codes)):
+            if codes[i] != codes[i - 1]:
+                n_edits += 1
+                n_recent_edits += i > earlier
+            if (values[i] != values[i - 1]).any():
+                last_change = i
+            if values[i][-1] > values[i - 1][-1]:
+                last_growth = i
+
+        rows.append({
+            "assignmentID": assignment,
+            "traceID": trace,
+            "index": index[last],
+            "n_snapshots": len(codes),
+            "n_edits": n_edits,
+            "n_recent_edits": n_recent_edits,
+            "since_structural_change": index[last] - index[last_change],
+            "stall_length": index[last] - index[last_growth],
+            **{"delta_" + c: delta
+               for c, delta in zip(COUNTS, values[last] - values[earlier])},
+        })
+    return pd.DataFrame(rows)
+
+
+def by_trace(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.astype({key: str for key in KEYS})
+    return frame.sort_values(KEYS).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("k", [1, 3, 5])
+def test_matches_per_trace_loop(k):
+    request = import_script("isnap-f16-f17/request.py")
+    type_to_category = load_type_to_category(grammar_path(DATASET))
+    requests = read_table("traces", DATASET / "requests.csv")
+    requests = requests.sample(frac=1, random_state=0)
+
+    history = request.request_history(requests, type_to_category, k)
+    expected = reference_history(requests, type_to_category, k)
+
+    pd.testing.assert_frame_equal(by_trace(history), by_trace(expected),
+                                  check_dtype=False)
@@ -0,0 +1,43 @@
+"""Both CSV engines in ``schema.read_table`` must give identical frames."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import schema
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FILES = [
+    ("traces", "isnap-s16/training.csv"),
+    ("traces", "isnap-s16/requests.csv"),
+    ("gold", "isnap-s16/gold-standard.csv"),
+    ("gold", "isnap-f16-f17/gold-standard.csv"),
+]
+
+
+@pytest.mark.parametrize("name, path", FILES)
+def test_engines_agree(name, path, monkeypatch):
+    path = ROOT / path
+    if schema.pa_csv is None:
+        pytest.skip("pyarrow is not installed")
+    assert path.stat().st_size >= schema.PYARROW_MIN_BYTES
+
+    with_pyarrow = schema.read_table(name, path)
+    monkeypatch.setattr(schema, "pa_csv", None)
+    with_pandas = schema.read_table(name, path)
+
+    pd.testing.assert_frame_equal(with_pyarrow, with_pandas)
+
+
+@pytest.mark.parametrize("name, path", FILES)
+def test_chunks_agree(name, path):
+    path = ROOT / path
+    whole = schema.read_table(name, path)
+    chunks = pd.concat(schema.read_table(name, path, chunksize=100),
+                       ignore_index=True)
+
+    # Each chunk only knows the categories it contains
+    for col in whole.select_dtypes("category"):
+        chunks[col] = chunks[col].astype(whole[col].dtype)
+    pd.testing.assert_frame_equal(whole, chunks)
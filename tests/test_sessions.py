@@ -0,0 +1,73 @@
+"""Chunked and in-memory sessionization of a MainTable must agree."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import read_table
+from scripts import import_script
+
+sessions = import_script("prog-snap-2/sessions.py")
+
+IDLE_GAP = 600
+
+
+def main_table(n_events: int, seed: int = 0) -> pd.DataFrame:
+    """Chronological MainTable rows for a few students and assignments.
+
+    Gaps are drawn so that many exceed ``IDLE_GAP``, some timestamps tie,
+    and a run of events in the middle has no timestamp at all.
+    """
+    rng = np.random.default_rng(seed)
+    gaps = rng.choice([0, 5, 60, 300, 2 * IDLE_GAP], size=n_events,
+                      p=[0.1, 0.4, 0.3, 0.1, 0.1])
+    times = pd.Timestamp("2017-01-01", tz="UTC") + pd.to_timedelta(
+        np.cumsum(gaps), unit="s"
+    )
+    timestamps = pd.Series(times.strftime("%Y-%m-%dT%H:%M:%SZ"), dtype=object)
+    timestamps[n_events // 2:n_events // 2 + 50] = None
+
+    return pd.DataFrame({
+        "EventID": np.arange(n_events).astype(str),
+        "Order": np.arange(n_events),
+        "SubjectID": rng.choice(["s1", "s2", "s3", "s4"], size=n_events),
+        "AssignmentID": rng.choice(["a1", "a2"], size=n_events),
+        "EventType": "File.Edit",
+        "ServerTimestamp": timestamps,
+        "X-HintData": np.where(rng.random(n_events) < 0.1, "{}", None),
+    })
+
+
+def canonical(frame: pd.DataFrame, by: list) -> pd.DataFrame:
+    return frame.sort_values(by, kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunksize", [7, 50, 1000])
+def test_chunks_match_in_memory(tmp_path, chunksize):
+    path = tmp_path / "MainTable.csv"
+    main_table(600).to_csv(path, index=False)
+
+    expected_sessions, expected_hints = sessions.sessionize(
+        read_table("main", path), IDLE_GAP
+    )
+    chunked_sessions, chunked_hints = sessions.sessionize_chunks(
+        path, IDLE_GAP, chunksize
+    )
+
+    by = sessions.KEYS + ["session"]
+    pd.testing.assert_frame_equal(
+        canonical(chunked_sessions, by), canonical(expected_sessions, by)
+    )
+    by = sessions.KEYS + ["time", "position"]
+    pd.testing.assert_frame_equal(
+        canonical(chunked_hints, by), canonical(expected_hints, by)
+    )
+
+
+def test_empty_table(tmp_path):
+    path = tmp_path / "MainTable.csv"
+    main_table(0).to_csv(path, index=False)
+
+    for result in sessions.sessionize(read_table("main", path)):
+        assert len(result) == 0
+    for result in sessions.sessionize_chunks(path, chunksize=10):
+        assert len(result) == 0
@@ -0,0 +1,76 @@
+"""Sharded analyses must reproduce the single-node result."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shard
+
+ROOT = Path(__file__).resolve().parents[1]
+DATASET = ROOT / "isnap-s16"
+
+
+def test_stack_mixed_categorical_and_strings():
+    # One partial concatenated frames with different categories
+    partials = [
+        pd.DataFrame({"assignmentID": pd.Series(["b", "a"], dtype="str")}),
+        pd.DataFrame({"assignmentID": pd.Categorical(["c", "b"])}),
+    ]
+    stacked = shard.stack(partials)
+
+    assert isinstance(stacked["assignmentID"].dtype, pd.CategoricalDtype)
+    assert list(stacked["assignmentID"].cat.categories) == ["a", "b", "c"]
+    assert stacked["assignmentID"].tolist() == ["b", "a", "c", "b"]
+
+
+@pytest.mark.parametrize("n_shards", [3, 8])
+@pytest.mark.parametrize("analysis",
+                         ["features", "history", "ambiguity", "evolution"])
+def test_shards_match_single_node(analysis, n_shards, tmp_path):
+    shard.partition(DATASET, tmp_path, n_shards)
+    for directory in shard.shard_dirs(tmp_path):
+        shard.map_shard(analysis, directory)
+
+    shard._assert_equal(shard.reduce_shards(analysis, tmp_path),
+                        shard.single_node(analysis, DATASET))
+
+
+def write_main_table(path: Path, n_rows: int = 600):
+    """A MainTable in the ProgSnap2 column order (``EventType`` first),
+    which differs from the schema's, with a column the schema drops."""
+    rng = np.random.default_rng(0)
+    hints = rng.choice(["", "{}"], n_rows, p=[0.9, 0.1])
+    pd.DataFrame({
+        "EventType": rng.choice(["Run.Program", "X-Hint"], n_rows),
+        "EventID": [f"e{i}" for i in range(n_rows)],
+        "SubjectID": rng.integers(0, 40, n_rows).astype(str),
+        "ToolInstances": "Snap!",
+        "Order": np.arange(n_rows),
+        "AssignmentID": rng.choice(["guess1Lab", "squiralHW"], n_rows),
+        "CodeStateID": rng.integers(0, 100, n_rows),
+        "ServerTimestamp": "2017-01-01T00:00:00",
+        "X-HintData": hints,
+    }).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("n_shards", [1, 3, 8])
+def test_hint_usage_with_reordered_columns(n_shards, tmp_path):
+    dataset = tmp_path / "dataset"
+    dataset.mkdir()
+    write_main_table(dataset / "MainTable.csv")
+
+    shards_dir = tmp_path / "shards"
+    shard.partition(dataset, shards_dir, n_shards, chunksize=100)
+    stacked = pd.concat([
+        shard.read_table("main", d / "MainTable.csv")
+        for d in shard.shard_dirs(shards_dir)
+    ]).sort_values("Order").reset_index(drop=True)
+    source = shard.read_table("main", dataset / "MainTable.csv")
+    pd.testing.assert_frame_equal(stacked.astype(str),
+                                  source[stacked.columns].astype(str))
+
+    for directory in shard.shard_dirs(shards_dir):
+        shard.map_shard("hint-usage", directory)
+    shard._assert_equal(shard.reduce_shards("hint-usage", shards_dir),
+                        shard.single_node("hint-usage", dataset))